@@ -0,0 +1,18 @@
+import random
+
+from water_sort.levels import generate_level_colors
+from water_sort.state import make_state, can_pour_on_state, apply_move_on_state
+
+
+def replay(state, path):
+    # Applies path to state, failing the test on an illegal pour.
+    state = make_state(state)
+    for from_idx, to_idx in path:
+        assert can_pour_on_state(state, from_idx, to_idx), (from_idx, to_idx)
+        state = apply_move_on_state(state, from_idx, to_idx)
+    return state
+
+
+def make_level(num_colors, seed):
+    random.seed(seed)
+    return make_state(generate_level_colors(num_colors))
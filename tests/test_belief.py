@@ -0,0 +1,104 @@
+import contextlib
+import io
+import random
+
+from water_sort import solve
+from water_sort.belief import (
+    BeliefState, _bounded_andor, generate_possible_worlds, solve_andor_belief_state, solve_conformant
+)
+from water_sort.levels import visibility_for_mode
+from water_sort.packed import TUBE_BITS, TUBE_MASK
+from water_sort.solvers import solve_bfs
+from water_sort.state import heuristic, is_goal_state
+
+from conftest import make_level, replay
+
+
+def recolored(level):
+    colors = sorted({color for tube in level for color in tube})
+    renamed = dict(zip(colors, colors[1:] + colors[:1]))
+    return [tuple(renamed[color] for color in tube) for tube in level]
+
+
+def new_stats():
+    return {'and_nodes': 0, 'or_nodes': 0, 'belief_states_explored': 0, 'max_belief_size': 0,
+            'total_worlds_processed': 0, 'iterations': 0}
+
+
+def test_conformant_plan_is_shortest_for_every_world():
+    level = make_level(3, 1)
+    worlds = [level, recolored(level)]
+    plan = solve_conformant(worlds)
+    assert plan['steps'] == solve_bfs(level, macro=False)['steps']
+    for world in worlds:
+        assert is_goal_state(replay(world, plan['path']))
+
+
+def test_conformant_gives_up_when_worlds_need_different_pours():
+    first = [(1, 1, 1, 2), (2, 2, 2, 1), (3, 3, 3, 3), (), ()]
+    second = [(1, 1, 2, 2), (1, 2, 2, 1), (3, 3, 3, 3), (), ()]
+    assert solve_conformant([first, second]) is None
+
+
+def test_andor_deepening_finds_a_shortest_plan():
+    level = make_level(3, 1)
+    visibility = tuple(tuple(True for _ in tube) for tube in level)
+    result = solve_andor_belief_state(level, visibility, is_hidden_mode=True, deepening=True)
+    assert is_goal_state(replay(level, result['path']))
+    assert result['steps'] == solve_bfs(level, macro=False)['steps']
+    assert result['belief_stats']['iterations'] > 1
+
+
+def test_andor_reuses_solved_beliefs():
+    belief = BeliefState([make_level(3, 1)])
+    solved, failed = {}, {}
+    stats = new_stats()
+    status, path = _bounded_andor(belief, 30, solved, failed, stats)
+    assert path and is_goal_state(replay(make_level(3, 1), path))
+    assert solved[belief.signature] == tuple(path)
+    stats = new_stats()
+    assert _bounded_andor(belief, 30, solved, failed, stats) == (status, path)
+    assert stats['and_nodes'] == 1
+
+
+def test_hidden_andor_returns_partial_plan_when_budget_runs_out():
+    level = make_level(5, 1)
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = solve("and_or", level, max_nodes=40, visibility=visibility_for_mode(level, "hidden"))
+    assert result['status'] == "budget_exhausted"
+    assert result['path']
+    assert heuristic(replay(level, result['path'])) < heuristic(level)
+
+
+def fresh_signature(belief):
+    # The signature from the tube keys alone, bypassing the store's hash cache.
+    store = belief.store
+    signature = 0
+    for code in belief.codes:
+        for i in range(store.num_tubes):
+            signature ^= store.tube_key(i, (code >> (i * TUBE_BITS)) & TUBE_MASK)
+    return signature
+
+
+def test_incremental_signature_matches_recomputed():
+    rng = random.Random(0)
+    random.seed(0)
+    level = make_level(4, 2)
+    with contextlib.redirect_stdout(io.StringIO()):
+        worlds = generate_possible_worlds(level, visibility_for_mode(level, "hidden"), max_worlds=40)
+    belief = BeliefState(worlds)
+    num_tubes = len(level)
+    for _ in range(300):
+        # Pours legal in only some worlds move those and merge any that meet.
+        actions = belief.get_valid_actions() if rng.random() < 0.5 else []
+        action = rng.choice(actions) if actions else tuple(rng.sample(range(num_tubes), 2))
+        belief = belief.apply_action(action)
+        assert len(set(belief.codes)) == len(belief.codes)
+        assert belief.signature == fresh_signature(belief)
+        assert belief.signature == BeliefState(belief.worlds, belief.store).signature
+
+    # A pour legal in one world only turns it into the other: one world left.
+    belief = BeliefState([[(1, 2), (2,), ()], [(1,), (2, 2), ()]])
+    merged = belief.apply_action((0, 1))
+    assert merged.size() == 1
+    assert merged.signature == fresh_signature(merged)
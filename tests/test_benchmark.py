@@ -0,0 +1,54 @@
+import pytest
+
+from water_sort import benchmark
+from water_sort.benchmark import MODES, compare_to_baseline, generate_corpus, run_one
+
+
+def row(level="classic-4-0", solver="a_star", status="solved", steps=20, time=1.0, nodes=1000):
+    return {'level': level, 'solver': solver, 'status': status, 'steps': steps, 'time': time, 'nodes': nodes}
+
+
+def test_corpus_is_reproducible():
+    corpus = generate_corpus(seed=7, color_counts=range(3, 5), levels_per_size=2)
+    assert corpus == generate_corpus(seed=7, color_counts=range(3, 5), levels_per_size=2)
+    assert len(corpus) == 2 * 2 * len(MODES)
+    assert len({level['id'] for level in corpus}) == len(corpus)
+    other = generate_corpus(seed=8, color_counts=range(3, 5), levels_per_size=2)
+    assert [level['state'] for level in corpus] != [level['state'] for level in other]
+    # Every mode of a level shares its state and only changes what is visible.
+    by_level = {}
+    for level in corpus:
+        by_level.setdefault(level['id'].split("-", 1)[1], set()).add(level['state'])
+    assert all(len(states) == 1 for states in by_level.values())
+
+
+def test_baseline_status_and_steps():
+    baseline = [row(), row(solver="bfs", status="budget")]
+    regressions, improvements = compare_to_baseline([row(status="budget"), row(solver="bfs")], baseline)
+    assert regressions == ["classic-4-0 a_star: solved -> budget"]
+    assert improvements == ["classic-4-0 bfs: budget -> solved"]
+    regressions, _ = compare_to_baseline([row(steps=21)], [row()])
+    assert regressions == ["classic-4-0 a_star: steps 20 -> 21"]
+
+
+def test_baseline_nodes_and_time_have_a_tolerance():
+    assert compare_to_baseline([row(nodes=1050, time=1.1)], [row()]) == ([], [])
+    regressions, _ = compare_to_baseline([row(nodes=1200)], [row()])
+    assert regressions == ["classic-4-0 a_star: nodes 1000 -> 1200"]
+    regressions, _ = compare_to_baseline([row(nodes=1050)], [row()], node_tolerance=0.01)
+    assert regressions == ["classic-4-0 a_star: nodes 1000 -> 1050"]
+    regressions, _ = compare_to_baseline([row(time=1.5)], [row()])
+    assert regressions == ["classic-4-0 a_star: time 1.000s -> 1.500s"]
+    _, improvements = compare_to_baseline([row(nodes=500, time=0.5)], [row()])
+    assert improvements == ["classic-4-0 a_star: nodes 1000 -> 500", "classic-4-0 a_star: time 1.000s -> 0.500s"]
+    # Tiny runs are all noise.
+    assert compare_to_baseline([row(time=0.04)], [row(time=0.01)]) == ([], [])
+
+
+@pytest.mark.skipif(benchmark.resource is None, reason="needs the resource module")
+def test_parallel_run_reports_worker_memory():
+    level = generate_corpus(seed=7, color_counts=[4], modes=["classic"], levels_per_size=1)[0]
+    result = run_one(level, "parallel_bfs", time_limit=30)
+    assert result['status'] == "solved"
+    assert result['peak_memory']
+    assert result['worker_memory']
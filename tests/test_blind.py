@@ -0,0 +1,78 @@
+import contextlib
+import io
+import random
+
+from water_sort.api import solve, BUDGET_EXHAUSTED
+from water_sort.belief import (
+    WorldMatrix, _solve_worlds, after_test, generate_blind_worlds, simulate_test_on_world, solve_blind_mode
+)
+from water_sort.budget import SearchBudget
+from water_sort.state import CAPACITY, is_goal_state, apply_move_on_state
+
+from conftest import make_level, replay
+
+
+def quiet(function, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return function(*args, **kwargs)
+
+
+def test_blind_mode_solves_small_level():
+    level = make_level(3, 0)
+    result = quiet(solve_blind_mode, level)
+    assert result is not None
+    assert is_goal_state(replay(level, result['path']))
+
+
+def test_blind_mode_small_node_budget_is_exhausted():
+    level = make_level(4, 1)
+    for max_nodes in (5, 50, 500):
+        result = quiet(solve, "blind", level, max_nodes=max_nodes)
+        assert result['status'] == BUDGET_EXHAUSTED
+        assert result['stuck']
+        replay(level, result['path'])
+
+
+def test_blind_mode_time_limit_is_exhausted():
+    result = quiet(solve, "blind", make_level(5, 2), time_limit=0.01)
+    assert result['status'] == BUDGET_EXHAUSTED
+
+
+def test_worker_processes_keep_the_node_budget():
+    worlds = [make_level(6, seed) for seed in range(4)]
+    budget = SearchBudget(max_nodes=50)
+    results = _solve_worlds(worlds, 2, budget)
+    assert budget.exhausted == "nodes"
+    assert len(results) == 1 and results[0]['stuck']
+    assert all(result['path'] and not result.get('stuck') for result in _solve_worlds(worlds[:2], 2, None))
+
+
+def random_worlds(rng, count):
+    # Blind-mode worlds shuffled by random unit moves, so tubes have every fill.
+    worlds = []
+    for world in quiet(generate_blind_worlds, 7, 5, max_worlds=count):
+        for _ in range(rng.randrange(30)):
+            i, j = rng.sample(range(len(world)), 2)
+            if world[i] and len(world[j]) < CAPACITY:
+                world = apply_move_on_state(world, i, j)
+        worlds.append(world)
+    return worlds
+
+
+def test_world_matrix_matches_scalar_tests():
+    rng = random.Random(0)
+    random.seed(0)
+    worlds = random_worlds(rng, 200)
+    matrix = WorldMatrix.from_worlds(worlds)
+    assert matrix.to_worlds() == worlds
+    tests = [(i, j) for i in range(7) for j in range(7) if i != j]
+    outcomes = matrix.test_outcomes(tests)
+    for k, test in enumerate(tests):
+        expected = [simulate_test_on_world(test, world) == "success" for world in worlds]
+        assert outcomes[k].tolist() == expected
+        for result in ("success", "failure"):
+            kept = [world for world, success in zip(worlds, expected) if success == (result == "success")]
+            assert matrix.filter(outcomes[k] == (result == "success")).to_worlds() == kept
+            if result == "success":
+                kept = [apply_move_on_state(world, *test) for world in kept]
+            assert after_test(matrix, test, result).to_worlds() == kept
@@ -0,0 +1,38 @@
+from water_sort.budget import SearchBudget
+from water_sort.solvers import solve_bfs, solve_a_star
+from water_sort.state import is_goal_state
+
+from conftest import make_level, replay
+
+
+def test_run_keeps_its_own_best():
+    budget = SearchBudget()
+    first = budget.run()
+    first.record(1, "first")
+    second = budget.run()
+    assert second.best is None
+    second.record(5, "second")
+    assert second.best == "second"
+    assert first.best == "first"
+
+
+def test_run_shares_exhaustion():
+    budget = SearchBudget(max_nodes=10)
+    run = budget.run()
+    assert run.allows(10)
+    assert not run.allows(11)
+    assert budget.exhausted == "nodes"
+    assert run.exhausted == "nodes"
+
+
+def test_shared_budget_partial_path_belongs_to_its_run():
+    # A solved easy level leaves a low best score; the next run on the same
+    # budget must not turn that run's reference into its own path.
+    budget = SearchBudget(max_nodes=2000)
+    easy = make_level(3, 4)
+    assert is_goal_state(replay(easy, solve_bfs(easy, budget=budget)['path']))
+    hard = make_level(6, 1)
+    for solver in (solve_bfs, solve_a_star):
+        result = solver(hard, budget=budget)
+        assert result['stuck']
+        replay(hard, result['path'])
@@ -0,0 +1,88 @@
+import contextlib
+import io
+import random
+import sqlite3
+
+from water_sort import cache as cache_module
+from water_sort.api import solve, STUCK
+from water_sort.cache import SolutionCache
+from water_sort.levels import visibility_for_mode
+from water_sort.solvers import solve_bfs
+from water_sort.state import is_goal_state
+
+from conftest import make_level, replay
+
+
+def test_cache_round_trip(tmp_path):
+    cache = SolutionCache(str(tmp_path / "cache.sqlite3"))
+    level = make_level(4, 3)
+    assert cache.get("bfs", level) is None
+    assert cache.put("bfs", level, solve_bfs(level))
+    hit = cache.get("bfs", level)
+    assert hit['cached']
+    assert is_goal_state(replay(level, hit['path']))
+
+
+def test_visibility_is_part_of_the_key(tmp_path):
+    cache = SolutionCache(str(tmp_path / "cache.sqlite3"))
+    level = make_level(4, 3)
+    hidden = visibility_for_mode(level, "hidden")
+    blind = visibility_for_mode(level, "blind")
+    cache.put("and_or", level, solve_bfs(level))
+    assert cache.get("and_or", level, visibility=hidden) is None
+    cache.put("and_or", level, solve_bfs(level), visibility=hidden)
+    assert cache.get("and_or", level, visibility=hidden) is not None
+    assert cache.get("and_or", level, visibility=blind) is None
+    assert len(cache) == 2
+
+
+def test_shuffled_and_recolored_copies_hit(tmp_path):
+    cache = SolutionCache(str(tmp_path / "cache.sqlite3"))
+    rng = random.Random(0)
+    for seed in range(10):
+        level = make_level(5, seed)
+        cache.put("bfs", level, solve_bfs(level))
+        colors = sorted({color for tube in level for color in tube})
+        for _ in range(5):
+            renamed = dict(zip(colors, rng.sample(colors, len(colors))))
+            copy = [tuple(renamed[color] for color in tube) for tube in level]
+            rng.shuffle(copy)
+            hit = cache.get("bfs", copy)
+            assert hit is not None
+            assert is_goal_state(replay(copy, hit['path']))
+    assert len(cache) == 10
+
+
+def test_only_solutions_are_stored(tmp_path):
+    cache = SolutionCache(str(tmp_path / "cache.sqlite3"))
+    level = make_level(4, 3)
+    stuck = dict(solve_bfs(level), stuck=True)
+    assert not cache.put("hill_climb", level, stuck)
+    result = solve("hill_climb", level, cache=cache, max_restarts=1, max_iterations_per_run=1)
+    assert result['status'] == STUCK
+    assert len(cache) == 0
+    solve("bfs", level, cache=cache)
+    assert solve("bfs", level, cache=cache)['cached']
+
+
+def test_database_errors_disable_the_cache(tmp_path):
+    level = make_level(4, 3)
+    for name, use in (("len", len), ("clear", SolutionCache.clear)):
+        path = str(tmp_path / f"{name}.sqlite3")
+        cache = SolutionCache(path)
+        assert cache.put("bfs", level, solve_bfs(level))
+        with contextlib.closing(sqlite3.connect(path)) as other:
+            other.execute("DROP TABLE solutions")
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            use(cache)
+        assert "Solution cache disabled" in output.getvalue()
+        assert len(cache) == 0
+        assert cache.get("bfs", level) is None
+
+
+def test_version_is_part_of_the_key(tmp_path, monkeypatch):
+    cache = SolutionCache(str(tmp_path / "cache.sqlite3"))
+    level = make_level(4, 3)
+    cache.put("bfs", level, solve_bfs(level))
+    monkeypatch.setattr(cache_module, "CACHE_VERSION", cache_module.CACHE_VERSION + 1)
+    assert cache.get("bfs", level) is None
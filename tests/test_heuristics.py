@@ -0,0 +1,27 @@
+from water_sort.heuristics import get_heuristic_engine
+from water_sort.packed import pack_state, packed_apply_move, packed_successors
+from water_sort.pdb import pattern_database_for_state
+from water_sort.solvers import solve_bfs
+
+from conftest import make_level
+
+
+def test_packed_after_move_matches_full_evaluation():
+    engine = get_heuristic_engine()
+    level = make_level(5, 2)
+    code, _ = pack_state(level)
+    score = engine.evaluate_packed(code, len(level))
+    for i, j, new_code in packed_successors(code, len(level)):
+        assert engine.packed_after_move(score, code, new_code, i, j) == engine.evaluate_packed(new_code, len(level))
+
+
+def test_pattern_database_is_admissible(tmp_path):
+    for seed in range(3):
+        level = make_level(3, seed)
+        engine = pattern_database_for_state(level, str(tmp_path))
+        path = solve_bfs(level, macro=False)['path']
+        code, _ = pack_state(level)
+        for done, (i, j) in enumerate(path):
+            assert engine.evaluate_packed(code, len(level)) <= len(path) - done
+            code = packed_apply_move(code, len(level), i, j)
+        assert engine.evaluate_packed(code, len(level)) == 0
@@ -0,0 +1,139 @@
+import random
+
+import numpy as np
+import pytest
+
+from water_sort import solve, solvers_for_mode
+from water_sort.packed import count_pours
+from water_sort.heuristics import get_heuristic_engine
+from water_sort.packed import (
+    canonical_key, pack_state, packed_macro_successors, packed_successors, split_tubes, join_tubes,
+)
+from water_sort.solvers import solve_bfs
+from water_sort.tempering import _Replicas
+from water_sort.vectorized import expand_layer
+from water_sort.state import is_goal_state, heuristic
+
+from conftest import make_level, replay
+
+
+def test_registry_bfs_is_shortest_in_steps():
+    for seed in range(4):
+        level = make_level(5, seed)
+        result = solve("bfs", level)
+        macro = solve_bfs(level, macro=True)
+        assert result['status'] == "solved"
+        assert is_goal_state(replay(level, result['path']))
+        assert result['steps'] <= macro['steps']
+        assert macro['pours'] <= result['pours'] <= result['steps']
+
+
+def test_count_pours_merges_repeated_moves():
+    assert count_pours([]) == 0
+    assert count_pours([(0, 1), (0, 1), (2, 0), (0, 1)]) == 3
+
+
+def test_abca_returns_a_legal_path():
+    level = make_level(3, 0)
+    random.seed(3)
+    result = solve("abca", level, max_nodes=20000)
+    assert result['status'] in ("solved", "stuck", "budget_exhausted")
+    final = replay(level, result['path'])
+    assert is_goal_state(final) == (result['status'] == "solved")
+
+
+def test_parallel_bfs_partial_path_makes_progress():
+    level = make_level(7, 1)
+    result = solve("parallel_bfs", level, max_nodes=3000, workers=2)
+    assert result['status'] == "budget_exhausted"
+    assert result['path']
+    assert heuristic(replay(level, result['path'])) < heuristic(level)
+
+
+def test_classic_and_or_partial_path_makes_progress():
+    level = make_level(6, 1)
+    result = solve("and_or", level, max_nodes=300)
+    assert result['status'] == "budget_exhausted"
+    assert result['path']
+    assert heuristic(replay(level, result['path'])) < heuristic(level)
+
+
+def test_relabeled_key_ignores_tube_order_and_color_names():
+    rng = random.Random(0)
+    for seed in range(30):
+        level = make_level(rng.randrange(3, 7), seed)
+        colors = sorted({color for tube in level for color in tube})
+        renamed = dict(zip(colors, rng.sample(colors, len(colors))))
+        copy = [tuple(renamed[color] for color in tube) for tube in level]
+        rng.shuffle(copy)
+        code, _ = pack_state(level)
+        copy_code, _ = pack_state(tuple(copy))
+        assert canonical_key(code, len(level), True) == canonical_key(copy_code, len(level), True)
+
+
+@pytest.mark.parametrize("num_colors,seed", [(4, 0), (5, 1), (6, 0)])
+def test_relabeled_bfs_never_expands_more_nodes(num_colors, seed):
+    level = make_level(num_colors, seed)
+    canonical = solve_bfs(level, canonical=True)
+    relabeled = solve_bfs(level, canonical=True, relabel_colors=True)
+    assert len(relabeled['path']) == len(canonical['path'])
+    assert relabeled['nodes'] <= canonical['nodes']
+
+
+def test_numpy_layer_expansion_matches_macro_successors():
+    rng = random.Random(0)
+    codes = []
+    for seed in range(20):
+        level = make_level(rng.randrange(3, 7), seed)
+        code, _ = pack_state(level)
+        # Random unit pours give partial tubes, runs and several empty tubes.
+        for _ in range(rng.randrange(40)):
+            children = packed_successors(code, len(level))
+            if children:
+                code = rng.choice(children)[2]
+        codes.append((code, len(level)))
+    for num_tubes in {n for _, n in codes}:
+        states = [code for code, n in codes if n == num_tubes]
+        layer = np.array([split_tubes(code, num_tubes) for code in states], dtype=np.uint16)
+        children, parents, moves = expand_layer(layer)
+        for row, code in enumerate(states):
+            expected = set(packed_macro_successors(code, num_tubes))
+            found = set()
+            for child, move in zip(children[parents == row], moves[parents == row]):
+                tubes, amount = divmod(int(move), 8)
+                found.add((tubes // num_tubes, tubes % num_tubes, amount, join_tubes(int(t) for t in child)))
+            assert found == expected
+        assert len(children) > len(states)
+
+
+def test_tempering_reports_a_goal_reached_on_the_last_step():
+    level = [(1, 1, 1, 2), (2, 2, 2, 1), (), ()]
+    code, _ = pack_state(level)
+    replicas = _Replicas(code, len(level), get_heuristic_engine(), [0], seed=0)
+    for _ in range(10000):
+        report = replicas.run({0: 1.0}, 1)
+        if report['goal'] is not None:
+            break
+        assert not is_goal_state(replay(level, report['best'][1]))
+    assert is_goal_state(replay(level, report['goal']))
+
+
+def test_tempering_reseeds_a_chain_from_a_path():
+    level = make_level(4, 0)
+    code, _ = pack_state(level)
+    path = solve_bfs(level)['path'][:3]
+    replicas = _Replicas(code, len(level), get_heuristic_engine(), [0, 1], seed=0)
+    replicas.run({0: 0.05, 1: 2.0}, 0, reseed=(1, path))
+    assert replicas.chains[1]['path'] == path
+    assert replicas.chains[0]['path'] == []
+
+
+@pytest.mark.parametrize("algorithm", solvers_for_mode("classic"))
+def test_every_classic_solver_returns_a_legal_path(algorithm):
+    level = make_level(3, 2)
+    random.seed(0)
+    result = solve(algorithm, level, max_nodes=50000, time_limit=20)
+    assert result['status'] in ("solved", "stuck", "budget_exhausted")
+    assert is_goal_state(replay(level, result['path'])) == (result['status'] == "solved")
+    if algorithm in ("bfs", "bfs_numpy", "parallel_bfs", "bfs_external", "a_star", "ida_star", "bidirectional_bfs"):
+        assert result['status'] == "solved"
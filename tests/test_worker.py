@@ -0,0 +1,41 @@
+import time
+
+from water_sort.levels import visibility_for_mode
+from water_sort.state import is_goal_state
+from water_sort.worker import SolveJob
+
+from conftest import make_level, replay
+
+
+def wait(job, limit=60):
+    deadline = time.time() + limit
+    while job.poll() == "running" and time.time() < deadline:
+        time.sleep(0.05)
+    return job.status
+
+
+def test_job_solves_level():
+    level = make_level(4, 1)
+    job = SolveJob("a_star", level)
+    assert wait(job) == "done"
+    assert is_goal_state(replay(level, job.result['path']))
+
+
+def test_job_passes_visibility():
+    level = make_level(3, 1)
+    visibility = visibility_for_mode(level, "hidden")
+    job = SolveJob("and_or", level, visibility=visibility, max_depth=4)
+    assert wait(job) == "done"
+    assert job.options['visibility'] == visibility
+    # The hidden search has no plan this short; the classic one would return
+    # its (long) path instead of None.
+    assert job.result is None
+
+
+def test_job_cancel_and_timeout():
+    level = make_level(8, 1)
+    job = SolveJob("bfs", level)
+    job.cancel()
+    assert job.status == "cancelled"
+    job = SolveJob("bfs", level, timeout=0.2)
+    assert wait(job) == "timeout"
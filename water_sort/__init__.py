@@ -0,0 +1,28 @@
+from .state import (
+    CAPACITY, ALL_COLORS, make_state, is_goal_state,
+    can_pour_on_state, apply_move_on_state, get_all_valid_moves, heuristic
+)
+from .packed import (
+    pack_state, unpack_state, packed_is_goal, packed_heuristic, packed_apply_move, packed_successors,
+    packed_macro_successors, expand_macro_path, count_pours, packed_predecessors, canonical_key, canonical_permutation
+)
+from .heuristics import HeuristicEngine, get_heuristic_engine
+from .solvers import (
+    solve_bfs, solve_dfs, solve_a_star, solve_greedy, solve_beam, solve_sa,
+    solve_hill_climb_restarts, solve_backtracking, solve_abca
+)
+from .bidirectional import solve_bidirectional_bfs
+from .idastar import solve_ida_star
+from .vectorized import solve_bfs_numpy
+from .parallel import solve_parallel_a_star, solve_parallel_bfs
+from .external import solve_bfs_external
+from .tempering import solve_parallel_tempering
+from .belief import (
+    BeliefState, generate_blind_worlds, generate_possible_worlds, solve_blind_mode, solve_conformant,
+    solve_andor_belief_state, solve_andor_search
+)
+from .levels import generate_level_colors, visibility_for_mode
+from .budget import SearchBudget
+from .registry import SOLVERS, MULTIPROCESS_SOLVERS, solvers_for_mode
+from .api import solve
+from .cache import SolutionCache, get_solution_cache
@@ -0,0 +1,77 @@
+import time
+import tracemalloc
+
+from .budget import SearchBudget
+from .registry import SOLVERS
+from .packed import count_pours
+
+# --- Solver API ---
+# solve() runs any registry solver under one set of limits and always returns
+# a result dict with the same keys: 'algorithm', 'status', 'path', 'steps'
+# (unit pours), 'pours' (whole-run pours, as a player counts them), 'time',
+# 'nodes' and 'exhausted', plus whatever extra keys the solver added.
+# status is one of:
+#   "solved"            path reaches the goal
+#   "stuck"             the solver gave up on its own; path is the best it found
+#   "budget_exhausted"  a limit was hit (see 'exhausted'); path is the best so far
+#   "cancelled"         cancel was set; path is the best so far
+#   "unsolved"          the solver finished without a solution
+# deadline is an absolute time.time() value, time_limit is relative to the
+# call; the earlier of the two applies. max_memory (bytes) turns tracemalloc
+# on for the duration of the call if it is not already running. With
+# cache=SolutionCache(...) a cached result is returned without searching
+# (marked 'cached': True) and solved results are stored.
+SOLVED = "solved"
+STUCK = "stuck"
+BUDGET_EXHAUSTED = "budget_exhausted"
+CANCELLED = "cancelled"
+UNSOLVED = "unsolved"
+
+def solve(algorithm, state, deadline=None, time_limit=None, max_nodes=None, max_memory=None, cancel=None,
+          progress=None, cache=None, **options):
+    if algorithm not in SOLVERS:
+        raise ValueError(f"Unknown solver: {algorithm}")
+    budget = SearchBudget(max_nodes=max_nodes, time_limit=time_limit, progress=progress, deadline=deadline,
+                          max_memory=max_memory, cancel=cancel)
+    if cache is not None:
+        result = cache.get(algorithm, state, **options)
+        if result is not None:
+            return uniform_result(algorithm, result, budget, 0.0)
+    start_tracing = max_memory is not None and not tracemalloc.is_tracing()
+    if start_tracing:
+        tracemalloc.start()
+    start_time = time.time()
+    try:
+        result = SOLVERS[algorithm][1](state, budget=budget, **options)
+    finally:
+        if start_tracing:
+            tracemalloc.stop()
+    uniform = uniform_result(algorithm, result, budget, time.time() - start_time)
+    if cache is not None and uniform['status'] == SOLVED:
+        cache.put(algorithm, state, result, **options)
+    return uniform
+
+def uniform_result(algorithm, result, budget, elapsed):
+    if budget.exhausted == "cancelled":
+        status = CANCELLED
+    elif budget.exhausted:
+        status = BUDGET_EXHAUSTED
+    elif result is None:
+        status = UNSOLVED
+    elif result.get('stuck'):
+        status = STUCK
+    else:
+        status = SOLVED
+    uniform = dict(result or {})
+    path = uniform.get('path') or []
+    uniform.update({
+        'algorithm': algorithm,
+        'status': status,
+        'path': path,
+        'steps': len(path),
+        'pours': count_pours(path),
+        'time': uniform.get('time', elapsed),
+        'nodes': uniform.get('nodes', budget.nodes),
+        'exhausted': budget.exhausted,
+    })
+    return uniform
@@ -0,0 +1,950 @@
+import heapq
+import multiprocessing
+import random
+import time
+from collections import Counter
+from functools import partial
+
+import numpy as np
+
+from .state import (
+    ALL_COLORS, CAPACITY, make_state, is_goal_state, can_pour_on_state, apply_move_on_state, heuristic
+)
+from .packed import (
+    TUBE_BITS, TUBE_MASK, SLOT_BITS, MAX_PACKED_COLORS, pack_state, unpack_state, packed_is_goal, packed_heuristic,
+    packed_successors
+)
+from .budget import SearchBudget
+from .vectorized import solve_bfs_numpy
+
+# --- World Matrix ---
+# A set of worlds as one array: slots[w, t, k] is the palette index (1-based,
+# 0 = empty) of slot k of tube t in world w, lengths[w, t] the fill of that
+# tube. Test outcomes for many pours over every world are a few array
+# expressions, and filtering worlds is a boolean mask over the first axis.
+class WorldMatrix:
+    def __init__(self, slots, lengths, palette):
+        self.slots = slots
+        self.lengths = lengths
+        self.palette = palette
+
+    @classmethod
+    def from_worlds(cls, worlds, palette=None):
+        if palette is None:
+            palette = []
+            for world in worlds:
+                for tube in world:
+                    for color in tube:
+                        if color not in palette:
+                            palette.append(color)
+        index = {color: k + 1 for k, color in enumerate(palette)}
+        num_tubes = len(worlds[0]) if worlds else 0
+        slots = np.zeros((len(worlds), num_tubes, CAPACITY), dtype=np.uint8)
+        lengths = np.zeros((len(worlds), num_tubes), dtype=np.uint8)
+        for w, world in enumerate(worlds):
+            for t, tube in enumerate(world):
+                lengths[w, t] = len(tube)
+                for k, color in enumerate(tube):
+                    slots[w, t, k] = index[color]
+        return cls(slots, lengths, list(palette))
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def tops(self, tubes=None):
+        # Top palette index of every tube (or of tubes), 0 for an empty one.
+        if tubes is None:
+            tubes = np.arange(self.lengths.shape[1])
+        lengths = self.lengths[:, tubes].astype(np.intp)
+        top = self.slots[np.arange(len(self))[:, None], tubes, np.maximum(lengths - 1, 0)]
+        return np.where(lengths > 0, top, 0)
+
+    def test_outcomes(self, tests):
+        # Boolean (len(tests), worlds): would pouring test[0] -> test[1] succeed.
+        # Only the tubes the tests touch are looked at.
+        ends = np.array([test[0] for test in tests] + [test[1] for test in tests], dtype=np.intp)
+        tubes, position = np.unique(ends, return_inverse=True)
+        sources, destinations = position[:len(tests)], position[len(tests):]
+        tops = self.tops(tubes)
+        lengths = self.lengths[:, tubes]
+        source_length = lengths[:, sources]
+        destination_length = lengths[:, destinations]
+        success = ((source_length > 0) & (destination_length < CAPACITY)
+                   & ((destination_length == 0) | (tops[:, sources] == tops[:, destinations])))
+        return success.T
+
+    def filter(self, mask):
+        return WorldMatrix(self.slots[mask], self.lengths[mask], self.palette)
+
+    def apply_move(self, from_idx, to_idx, where=None):
+        # Pours one unit in every world (of where, if given) where the pour is legal.
+        legal = self.test_outcomes([(from_idx, to_idx)])[0]
+        if where is not None:
+            legal &= where
+        rows = np.nonzero(legal)[0]
+        slots = self.slots.copy()
+        lengths = self.lengths.copy()
+        source_top = lengths[rows, from_idx].astype(np.intp) - 1
+        slots[rows, to_idx, lengths[rows, to_idx]] = slots[rows, from_idx, source_top]
+        slots[rows, from_idx, source_top] = 0
+        lengths[rows, from_idx] -= 1
+        lengths[rows, to_idx] += 1
+        return WorldMatrix(slots, lengths, self.palette)
+
+    def solved(self):
+        uniform = (self.slots == self.slots[..., :1]).all(axis=2)
+        return ((self.lengths == 0) | ((self.lengths == CAPACITY) & uniform)).all(axis=1)
+
+    def to_worlds(self):
+        worlds = []
+        for world_slots, world_lengths in zip(self.slots, self.lengths):
+            worlds.append(tuple(tuple(self.palette[index - 1] for index in tube[:length])
+                                for tube, length in zip(world_slots, world_lengths)))
+        return worlds
+
+# --- Blind Mode ---
+DEFAULT_BLIND_WORLDS = 200
+READY_WORLDS = 5
+READY_FRACTION = 10
+
+def generate_blind_worlds(num_tubes, num_colors, num_empty=2, max_worlds=DEFAULT_BLIND_WORLDS):
+    color_pool = []
+    colors_list = ALL_COLORS[:num_colors]
+    for color in colors_list:
+        color_pool.extend([color] * 4)
+    worlds = []
+    for _ in range(max_worlds):
+        random.shuffle(color_pool)
+        world = []
+        idx = 0
+        for tube_idx in range(num_tubes):
+            if tube_idx < num_colors:
+                tube = tuple(color_pool[idx:idx + 4])
+                idx += 4
+            else:
+                tube = ()
+            world.append(tube)
+        worlds.append(tuple(world))
+    worlds = list(set(worlds))
+    print(f"Generated {len(worlds)} possible worlds for blind mode")
+    return worlds
+
+def simulate_test_on_world(test, world):
+    from_idx, to_idx = test
+    source_tube = world[from_idx]
+    dest_tube = world[to_idx]
+    if not source_tube:
+        return "failure"
+    if len(dest_tube) >= 4:
+        return "failure"
+    if not dest_tube:
+        return "success"
+    if source_tube[-1] == dest_tube[-1]:
+        return "success"
+    return "failure"
+
+def calculate_test_score(test, possible_worlds):
+    from_idx, to_idx = test
+    success_count = 0
+    failure_count = 0
+    for world in possible_worlds:
+        result = simulate_test_on_world(test, world)
+        if result == "success":
+            success_count += 1
+        else:
+            failure_count += 1
+    return min(success_count, failure_count)
+
+def _as_matrix(possible_worlds):
+    if isinstance(possible_worlds, WorldMatrix):
+        return possible_worlds
+    return WorldMatrix.from_worlds(possible_worlds)
+
+# Test planning: a test is worth the entropy (bits) of its outcome over the
+# remaining worlds. With lookahead > 1 the LOOKAHEAD_WIDTH most informative
+# tests are also scored by the expected information of the best follow-up
+# tests, on the worlds each outcome leaves behind: a success pours in those
+# worlds, so later tests see the changed tubes. With lookahead=1 this picks
+# the same test as the old min(successes, failures) rule. Pours every world
+# allows tell nothing by themselves but reshape the tubes, so they are
+# scored by their follow-up tests alone, discounted so that a test which is
+# informative now wins a tie; when no test is informative one of them is
+# made.
+DEFAULT_LOOKAHEAD = 1
+LOOKAHEAD_WIDTH = 6
+CERTAIN_POUR_DISCOUNT = 0.5
+CERTAIN_LOOKAHEAD = 3
+
+def _outcome_entropy(successes, total):
+    p = np.clip(successes / total, 1e-12, 1 - 1e-12)
+    entropy = -(p * np.log2(p) + (1 - p) * np.log2(1 - p))
+    return np.where((successes == 0) | (successes == total), 0.0, entropy)
+
+def after_test(worlds, test, result):
+    # The worlds consistent with a test result, as they are after the test.
+    success = result == "success"
+    kept = worlds.filter(worlds.test_outcomes([test])[0] == success)
+    return kept.apply_move(*test) if success else kept
+
+def _plan_gains(worlds, tests, depth):
+    outcomes = worlds.test_outcomes(tests)
+    successes = outcomes.sum(axis=1)
+    gains = _outcome_entropy(successes, len(worlds))
+    if depth <= 1:
+        return gains
+    informative = [k for k in np.argsort(-gains, kind="stable")[:LOOKAHEAD_WIDTH] if gains[k] > 0]
+    certain = [k for k in np.nonzero(successes == len(worlds))[0][:LOOKAHEAD_WIDTH]]
+    for k in informative + certain:
+        for result, count in (("success", successes[k]), ("failure", len(worlds) - successes[k])):
+            remaining = after_test(worlds, tests[k], result) if count else None
+            if remaining is not None and len(remaining) > 1:
+                gains[k] += count / len(worlds) * _plan_gains(remaining, tests, depth - 1).max()
+    gains[certain] *= CERTAIN_POUR_DISCOUNT
+    return gains
+
+def _choose_test(worlds, state, lookahead, seen=None):
+    # (test, informative): the best test, and whether any test can tell the
+    # worlds apart at all. When none can, the test is a pour every world
+    # allows, if possible one that does not lead back to a state in seen.
+    candidate_tests = []
+    for i in range(len(state)):
+        if not state[i]:
+            continue
+        for j in range(len(state)):
+            if i == j:
+                continue
+            candidate_tests.append((i, j))
+    if not candidate_tests:
+        return None, False
+    if lookahead > 1 and len(worlds) > 1:
+        gains = _plan_gains(worlds, candidate_tests, lookahead)
+        if gains.max() > 0:
+            return candidate_tests[int(gains.argmax())], True
+    successes = worlds.test_outcomes(candidate_tests).sum(axis=1)
+    scores = np.minimum(successes, len(worlds) - successes)
+    if scores.max() == 0 and successes.max() == len(worlds):
+        # Nothing tells the worlds apart yet: make a pour all of them allow.
+        certain = [candidate_tests[k] for k in np.nonzero(successes == len(worlds))[0]]
+        if seen:
+            fresh = [test for test in certain if apply_move_on_state(state, *test) not in seen]
+            certain = fresh or certain
+        if len(certain) > 1 and len(worlds) > 1:
+            # Look ahead for the pour whose follow-up tests tell the most.
+            tests = certain + [test for test in candidate_tests if test not in certain]
+            gains = _plan_gains(worlds, tests, CERTAIN_LOOKAHEAD)[:len(certain)]
+            return certain[int(gains.argmax())], False
+        return certain[0], False
+    return candidate_tests[int(scores.argmax())], scores.max() > 0
+
+def select_best_test(possible_worlds, state, lookahead=1):
+    return _choose_test(_as_matrix(possible_worlds), state, lookahead)[0]
+
+def filter_worlds(possible_worlds, test, result):
+    worlds = _as_matrix(possible_worlds)
+    filtered = worlds.filter(worlds.test_outcomes([test])[0] == (result == "success"))
+    if isinstance(possible_worlds, WorldMatrix):
+        return filtered
+    return filtered.to_worlds()
+
+# --- Conformant Search ---
+# One pour sequence for several worlds at once: A* over the tuple of the
+# worlds' packed codes, where a pour is allowed only if it is legal in every
+# world and the goal is every world solved. Worlds that become identical
+# (including up to color names) collapse into one entry, so the joint state
+# only grows with the worlds that still differ, and the search tree shares
+# every common prefix. The heuristic is the largest minority count over the
+# worlds, admissible for unit pours, so plans are shortest. The search
+# gives up after CONFORMANT_NODES expansions (or on the budget) and returns
+# None when no such sequence exists.
+CONFORMANT_NODES = 20000
+
+def solve_conformant(worlds, max_nodes=CONFORMANT_NODES, budget=None):
+    start_time = time.time()
+    worlds = [make_state(world) for world in worlds]
+    if not worlds:
+        return None
+    num_tubes = len(worlds[0])
+    start = tuple(sorted({pack_state(world)[0] for world in worlds}))
+    parents = {start: None}
+    best_g = {start: 0}
+    open_list = [(max(packed_heuristic(code, num_tubes) for code in start), 0, start)]
+    nodes = 0
+    while open_list:
+        _, g, joint = heapq.heappop(open_list)
+        if g > best_g[joint]:
+            continue
+        nodes += 1
+        if all(packed_is_goal(code, num_tubes) for code in joint):
+            path = []
+            while parents[joint] is not None:
+                joint, move = parents[joint]
+                path.append(move)
+            path.reverse()
+            return {'path': path, 'steps': len(path), 'time': time.time() - start_time, 'nodes': nodes,
+                    'worlds': len(worlds)}
+        if nodes > max_nodes or (budget is not None and not budget.allows(nodes)):
+            return None
+        moves = None
+        for code in joint:
+            children = {(i, j): new_code for i, j, new_code in packed_successors(code, num_tubes)}
+            if moves is None:
+                moves = {move: [new_code] for move, new_code in children.items()}
+            else:
+                moves = {move: codes + [children[move]] for move, codes in moves.items() if move in children}
+        for move, codes in moves.items():
+            child = tuple(sorted(set(codes)))
+            if child not in best_g or g + 1 < best_g[child]:
+                best_g[child] = g + 1
+                parents[child] = (joint, move)
+                h = max(packed_heuristic(code, num_tubes) for code in child)
+                heapq.heappush(open_list, (g + 1 + h, g + 1, child))
+    return None
+
+def _solve_world(world, max_nodes=None, deadline=None):
+    # Worker side of _solve_worlds: the node limit and deadline cross the
+    # process boundary, the cancel token and progress callback stay behind.
+    budget = None
+    if max_nodes is not None or deadline is not None:
+        budget = SearchBudget(max_nodes=max_nodes, deadline=deadline)
+    return world, solve_bfs_numpy(world, budget=budget)
+
+def _solve_worlds(worlds, workers, budget, solutions=None):
+    # Independent BFS per world, in worker processes when workers > 1.
+    # solutions (world -> result) keeps the results across calls. Workers
+    # get the budget's limits, and the parent checks the budget (cancel
+    # included) on the summed nodes after each result; a stopped or stuck
+    # world is returned alone, as in the serial loop.
+    if solutions is None:
+        solutions = {}
+    missing = [world for world in worlds if world not in solutions]
+    if workers and workers > 1 and len(missing) > 1:
+        solve = _solve_world
+        if budget is not None:
+            solve = partial(_solve_world, max_nodes=budget.max_nodes, deadline=budget.deadline)
+        nodes = 0
+        with multiprocessing.Pool(min(workers, len(missing))) as pool:
+            for world, solution in pool.imap_unordered(solve, missing):
+                nodes += solution['nodes'] if solution else 0
+                if budget is not None and not budget.allows(nodes) or solution and solution.get('stuck'):
+                    return [solution]
+                solutions[world] = solution
+    else:
+        for world in missing:
+            solution = solve_bfs_numpy(world, budget=budget)
+            if budget is not None and budget.exhausted:
+                return [solution]
+            solutions[world] = solution
+    return [solutions[world] for world in worlds]
+
+def check_ready_to_solve(possible_worlds, budget=None, workers=None, solutions=None, ready_worlds=READY_WORLDS):
+    # With no plan for all of the worlds, the shortest plan of the first
+    # READY_WORLDS of them (if each has one) is tried.
+    if len(possible_worlds) == 0:
+        return False, None
+    if len(possible_worlds) == 1:
+        return True, possible_worlds[0]
+    if len(possible_worlds) <= ready_worlds:
+        plan = solve_conformant(possible_worlds, budget=budget)
+        if plan is not None:
+            return True, plan
+        solutions = _solve_worlds(possible_worlds[:READY_WORLDS], workers, budget, solutions)
+        if all(sol and not sol.get('stuck') for sol in solutions):
+            best_sol = min(solutions, key=lambda s: len(s['path']))
+            return True, best_sol
+    return False, None
+
+def _violations(initial, tests_performed):
+    # How many recorded test results each initial world contradicts.
+    worlds = initial
+    violations = np.zeros(len(initial), dtype=np.int64)
+    for test, result in tests_performed:
+        legal = worlds.test_outcomes([test])[0]
+        expected = result == "success"
+        violations += legal != expected
+        if expected:
+            worlds = worlds.apply_move(*test, where=legal)
+    return violations
+
+def _resample_worlds(num_tubes, num_colors, max_worlds, tests_performed, budget=None, nodes=0):
+    # Fresh initial worlds repaired into agreement with every test so far.
+    # Each round, every world that still contradicts a test gets up to
+    # REPAIR_CANDIDATES random two-unit swaps (at most REPAIR_BATCH in all),
+    # all replayed against the history as one matrix, and keeps the best of
+    # them unless it contradicts more tests than before. Every candidate
+    # counts as a node for the budget. Returns the consistent worlds as they
+    # are now, and the nodes.
+    initial = WorldMatrix.from_worlds(generate_blind_worlds(num_tubes, num_colors, max_worlds=max_worlds))
+    rng = np.random.default_rng(random.getrandbits(32))
+    units = num_colors * CAPACITY
+    violations = _violations(initial, tests_performed)
+    for _ in range(REPAIR_ROUNDS):
+        broken = np.nonzero(violations)[0]
+        if not len(broken):
+            break
+        width = max(1, min(REPAIR_CANDIDATES, REPAIR_BATCH // len(broken)))
+        nodes += len(broken) * width
+        if budget is not None and not budget.allows(nodes):
+            break
+        rows = np.repeat(broken, width)
+        candidates = np.arange(len(rows))
+        first_tube, first_slot = np.divmod(rng.integers(units, size=len(rows)), CAPACITY)
+        second_tube, second_slot = np.divmod(rng.integers(units, size=len(rows)), CAPACITY)
+        slots = initial.slots[rows]
+        slots[candidates, first_tube, first_slot] = initial.slots[rows, second_tube, second_slot]
+        slots[candidates, second_tube, second_slot] = initial.slots[rows, first_tube, first_slot]
+        swapped = _violations(WorldMatrix(slots, initial.lengths[rows], initial.palette), tests_performed)
+        swapped = swapped.reshape(len(broken), width)
+        pick = swapped.argmin(axis=1)
+        best = swapped[np.arange(len(broken)), pick]
+        keep = best <= violations[broken]
+        initial.slots[broken[keep]] = slots[(np.arange(len(broken)) * width + pick)[keep]]
+        violations[broken[keep]] = best[keep]
+    consistent = initial.filter(violations == 0)
+    if not len(consistent):
+        return consistent, nodes
+    _, first = np.unique(consistent.slots.reshape(len(consistent), -1), axis=0, return_index=True)
+    worlds = consistent.filter(np.sort(first))
+    for test, result in tests_performed:
+        worlds = after_test(worlds, test, result)
+    return worlds, nodes
+
+# Blind mode keeps the worlds in step with the real tubes: a successful test
+# pours in every world that allowed it, a failed one only filters. When no
+# sampled world is consistent any more, fresh ones are drawn and repaired
+# into agreement with the test history (see _resample_worlds), up to
+# RESAMPLE_ATTEMPTS times. While no test can tell the worlds apart, a pour
+# all of them allow is made (one not leading back to an earlier state where
+# possible), which exposes new units to test. Once at most
+# max_worlds // READY_FRACTION worlds (and never fewer than READY_WORLDS)
+# remain, the plan for them is carried out pour by pour, each pour doubling
+# as a test; a pour that fails sends the search back to testing with what it
+# learned. max_tests bounds the physical pours tried, plan pours included.
+# The returned path is every pour that succeeded, from the initial state.
+RESAMPLE_ATTEMPTS = 3
+REPAIR_ROUNDS = 100
+REPAIR_CANDIDATES = 16
+REPAIR_BATCH = 4096
+
+def solve_blind_mode(initial_state, max_tests=50, max_worlds=DEFAULT_BLIND_WORLDS, lookahead=DEFAULT_LOOKAHEAD,
+                     workers=None, budget=None):
+    start_time = time.time()
+    current_state = make_state(initial_state)
+    num_tubes = len(current_state)
+    all_colors_in_game = set()
+    for tube in current_state:
+        for color in tube:
+            all_colors_in_game.add(color)
+    num_colors = len(all_colors_in_game)
+    possible_worlds = generate_blind_worlds(num_tubes, num_colors, max_worlds=max_worlds)
+    if not possible_worlds:
+        print("Failed to generate worlds")
+        return None
+    possible_worlds = WorldMatrix.from_worlds(possible_worlds)
+    print(f"Starting with {len(possible_worlds)} possible worlds")
+    tests_performed = []
+    poured = []
+    ready_worlds = max(READY_WORLDS, max_worlds // READY_FRACTION)
+    seen = {current_state}
+    refuted = set()
+    solutions = {}
+    nodes = 0
+
+    def run_test(test):
+        nonlocal current_state, possible_worlds
+        from_idx, to_idx = test
+        if can_pour_on_state(current_state, from_idx, to_idx):
+            current_state = apply_move_on_state(current_state, from_idx, to_idx)
+            seen.add(current_state)
+            poured.append(test)
+            result = "success"
+        else:
+            refuted.add((current_state, test))
+            result = "failure"
+        tests_performed.append((test, result))
+        possible_worlds = after_test(possible_worlds, test, result)
+        refill()
+        return result
+
+    def refill():
+        nonlocal possible_worlds, nodes
+        attempts = 0
+        while not len(possible_worlds) and attempts < RESAMPLE_ATTEMPTS:
+            if budget is not None and budget.exhausted:
+                return
+            attempts += 1
+            possible_worlds, nodes = _resample_worlds(num_tubes, num_colors, max_worlds, tests_performed,
+                                                      budget, nodes)
+
+    while len(tests_performed) < max_tests:
+        nodes += 1
+        if budget is not None and not budget.allows(nodes):
+            # The pours made so far are real, so they are the partial path.
+            return {'path': poured, 'steps': len(poured), 'time': time.time() - start_time, 'nodes': nodes,
+                    'tests_performed': len(tests_performed), 'stuck': True, 'exhausted': budget.exhausted}
+        ready, solution = False, None
+        if len(possible_worlds) <= ready_worlds:
+            ready, solution = check_ready_to_solve(possible_worlds.to_worlds(), budget, workers, solutions,
+                                                   ready_worlds)
+        if ready and not isinstance(solution, dict):
+            solution = solve_bfs_numpy(solution, budget=budget)
+        if budget is not None and budget.exhausted:
+            continue
+        if ready and solution and not solution.get('stuck'):
+            print(f"✓ Ready to solve after {len(tests_performed)} tests, trying a {len(solution['path'])}-pour plan")
+            for move in solution['path']:
+                if len(tests_performed) >= max_tests:
+                    break
+                if run_test(move) == "failure":
+                    print(f"  Pour {move[0]} → {move[1]} failed, remaining worlds: {len(possible_worlds)}")
+                    break
+            if is_goal_state(current_state):
+                return {
+                    'path': poured,
+                    'steps': len(poured),
+                    'time': time.time() - start_time,
+                    'nodes': nodes,
+                    'tests_performed': len(tests_performed)
+                }
+            # Still unsolved, so no world that thinks it is solved is right.
+            possible_worlds = possible_worlds.filter(~possible_worlds.solved())
+            refill()
+            if not len(possible_worlds):
+                break
+            continue
+        test, informative = _choose_test(possible_worlds, current_state, lookahead, seen)
+        if test is not None and not informative and not possible_worlds.test_outcomes([test])[0].any():
+            # Every world is stuck, which the real tubes need not be: try a
+            # pour that has not failed here yet.
+            untried = [(i, j) for i in range(num_tubes) for j in range(num_tubes)
+                       if i != j and current_state[i] and (current_state, (i, j)) not in refuted]
+            test = untried[0] if untried else None
+        if test is None:
+            print("No valid tests available")
+            break
+        result = run_test(test)
+        print(f"Test {len(tests_performed)}: tube {test[0]} → {test[1]} = {result}")
+        print(f"  Remaining worlds: {len(possible_worlds)}")
+        if not len(possible_worlds):
+            break
+    if not len(possible_worlds):
+        print("✗ No consistent worlds left - puzzle may be unsolvable")
+        return None
+    print("✗ Failed to solve within test limit")
+    return None
+
+# --- Belief State và And-Or Search ---
+# A belief state is a set of worlds kept as packed codes (see packed.py),
+# all under the palette of one WorldStore shared by every belief state of a
+# search. The store also hands out Zobrist keys: each (tube index, tube
+# code) gets a random ZOBRIST_BITS-bit key, a world's hash is the XOR of its
+# tubes' keys and a belief's signature is the XOR of its worlds' hashes. A
+# pour changes two tubes, so apply_action moves a world's hash with four
+# XORs and the signature with two; worlds a pour makes identical are merged
+# (and XORed out once). The store caches world hashes and legal pours by
+# code, so a world reached again by any belief state costs dict lookups.
+ZOBRIST_BITS = 64
+DEFAULT_BELIEF_WORLDS = 50
+
+class WorldStore:
+    def __init__(self, num_tubes, palette=()):
+        self.num_tubes = num_tubes
+        self.palette = list(palette)
+        self._index = {color: k + 1 for k, color in enumerate(self.palette)}
+        self._keys = [{} for _ in range(num_tubes)]
+        self._hashes = {}
+        self._moves = {}
+        self._bounds = {}
+
+    def pack(self, world):
+        code = 0
+        for i, tube in enumerate(world):
+            for slot, color in enumerate(tube):
+                if color not in self._index:
+                    if len(self.palette) >= MAX_PACKED_COLORS:
+                        raise ValueError(f"Packed states support at most {MAX_PACKED_COLORS} colors")
+                    self.palette.append(color)
+                    self._index[color] = len(self.palette)
+                code |= self._index[color] << (i * TUBE_BITS + slot * SLOT_BITS)
+        return code
+
+    def unpack(self, code):
+        return unpack_state(code, self.num_tubes, self.palette)
+
+    def moves(self, code):
+        # {(from_idx, to_idx): new_code} for every legal unit pour.
+        moves = self._moves.get(code)
+        if moves is None:
+            moves = {(i, j): new_code for i, j, new_code in packed_successors(code, self.num_tubes)}
+            self._moves[code] = moves
+        return moves
+
+    def bound(self, code):
+        # Minority units: each needs at least one pour.
+        bound = self._bounds.get(code)
+        if bound is None:
+            bound = self._bounds[code] = packed_heuristic(code, self.num_tubes)
+        return bound
+
+    def tube_key(self, i, tube_code):
+        keys = self._keys[i]
+        key = keys.get(tube_code)
+        if key is None:
+            key = keys[tube_code] = random.getrandbits(ZOBRIST_BITS)
+        return key
+
+    def world_hash(self, code):
+        world_hash = self._hashes.get(code)
+        if world_hash is None:
+            world_hash = 0
+            for i in range(self.num_tubes):
+                world_hash ^= self.tube_key(i, (code >> (i * TUBE_BITS)) & TUBE_MASK)
+            self._hashes[code] = world_hash
+        return world_hash
+
+    def moved_hash(self, code, new_code, from_idx, to_idx):
+        world_hash = self._hashes.get(new_code)
+        if world_hash is None:
+            world_hash = self.world_hash(code)
+            for i in (from_idx, to_idx):
+                shift = i * TUBE_BITS
+                world_hash ^= self.tube_key(i, (code >> shift) & TUBE_MASK)
+                world_hash ^= self.tube_key(i, (new_code >> shift) & TUBE_MASK)
+            self._hashes[new_code] = world_hash
+        return world_hash
+
+class BeliefState:
+    def __init__(self, worlds, store=None):
+        if store is None:
+            store = WorldStore(len(worlds[0]) if worlds else 0)
+        self.store = store
+        self.codes = tuple(dict.fromkeys(store.pack(world) for world in worlds))
+        self.signature = 0
+        for code in self.codes:
+            self.signature ^= store.world_hash(code)
+
+    @classmethod
+    def _from_codes(cls, store, codes, signature):
+        belief = cls.__new__(cls)
+        belief.store = store
+        belief.codes = codes
+        belief.signature = signature
+        return belief
+
+    @property
+    def worlds(self):
+        return [self.store.unpack(code) for code in self.codes]
+
+    def is_goal(self):
+        num_tubes = self.store.num_tubes
+        return all(packed_is_goal(code, num_tubes) for code in self.codes)
+
+    def get_valid_actions(self):
+        if not self.codes:
+            return []
+        valid_actions = None
+        for code in self.codes:
+            moves = self.store.moves(code)
+            valid_actions = set(moves) if valid_actions is None else valid_actions.intersection(moves)
+            if not valid_actions:
+                return []
+        return sorted(valid_actions)
+
+    def apply_action(self, action):
+        store = self.store
+        signature = self.signature
+        new_codes = {}
+        for code in self.codes:
+            new_code = store.moves(code).get(action)
+            if new_code is None:
+                new_code = code
+            else:
+                signature ^= store.world_hash(code) ^ store.moved_hash(code, new_code, *action)
+            if new_code in new_codes:
+                signature ^= store.world_hash(new_code)
+            else:
+                new_codes[new_code] = None
+        return BeliefState._from_codes(store, tuple(new_codes), signature)
+
+    def bound(self):
+        return max((self.store.bound(code) for code in self.codes), default=0)
+
+    def size(self):
+        return len(self.codes)
+
+def generate_possible_worlds(state, visibility, max_worlds=100):
+    visible_colors = []
+    hidden_counts = []
+    for tube, tube_visibility in zip(state, visibility):
+        visible = []
+        hidden_count = 0
+        for color, is_visible in zip(tube, tube_visibility):
+            if is_visible:
+                visible.append(color)
+            else:
+                hidden_count += 1
+        visible_colors.append(tuple(visible))
+        hidden_counts.append(hidden_count)
+    all_colors = []
+    for tube in state:
+        for color in tube:
+            all_colors.append(color)
+    color_counts = Counter(all_colors)
+    visible_color_counts = Counter()
+    for tube_visible in visible_colors:
+        for color in tube_visible:
+            visible_color_counts[color] += 1
+    hidden_available = {}
+    for color, total in color_counts.items():
+        hidden_available[color] = total - visible_color_counts.get(color, 0)
+    hidden_color_pool = []
+    for color, count in hidden_available.items():
+        hidden_color_pool.extend([color] * count)
+    if not hidden_color_pool:
+        world = tuple(visible_colors)
+        return [world]
+    total_hidden_slots = sum(hidden_counts)
+    if total_hidden_slots != len(hidden_color_pool):
+        return [_generate_simple_world(visible_colors, hidden_counts, hidden_color_pool)]
+    unique_perms = set()
+    attempts = 0
+    max_attempts = max_worlds * 10
+    while len(unique_perms) < max_worlds and attempts < max_attempts:
+        attempts += 1
+        shuffled = hidden_color_pool[:]
+        random.shuffle(shuffled)
+        world = _distribute_hidden_colors(visible_colors, hidden_counts, shuffled)
+        unique_perms.add(world)
+    worlds = list(unique_perms)
+    if not worlds:
+        worlds = [_generate_simple_world(visible_colors, hidden_counts, hidden_color_pool)]
+    print(f"Generated {len(worlds)} possible worlds for belief state")
+    return worlds
+
+def _distribute_hidden_colors(visible_colors, hidden_counts, color_pool):
+    world = []
+    pool_index = 0
+    for tube_idx, (visible, hidden_count) in enumerate(zip(visible_colors, hidden_counts)):
+        hidden_segment = []
+        for _ in range(hidden_count):
+            if pool_index < len(color_pool):
+                hidden_segment.append(color_pool[pool_index])
+                pool_index += 1
+        tube = tuple(hidden_segment + list(visible))
+        world.append(tube)
+    return tuple(world)
+
+def _generate_simple_world(visible_colors, hidden_counts, color_pool):
+    return _distribute_hidden_colors(visible_colors, hidden_counts, color_pool)
+
+def solve_andor_belief_state(initial_state, visibility=None, is_hidden_mode=True, max_depth=30,
+                             max_worlds=DEFAULT_BELIEF_WORLDS, deepening=False, budget=None):
+    start_time = time.time()
+    stats = {
+        'and_nodes': 0,
+        'or_nodes': 0,
+        'belief_states_explored': 0,
+        'max_belief_size': 0,
+        'total_worlds_processed': 0,
+        'iterations': 0
+    }
+    initial_state = make_state(initial_state)
+    if not is_hidden_mode or visibility is None:
+        return _solve_andor_classic(initial_state, start_time, stats, budget)
+    if budget is not None:
+        budget = budget.run()
+    possible_worlds = generate_possible_worlds(initial_state, visibility, max_worlds=max_worlds)
+    if not possible_worlds:
+        return None
+    initial_belief = BeliefState(possible_worlds)
+    stats['max_belief_size'] = initial_belief.size()
+    solution_path = _andor_search(initial_belief, stats, max_depth, deepening, budget)
+    elapsed_time = time.time() - start_time
+    if budget is not None and budget.exhausted:
+        # The plan prefix to the lowest-bound belief reached so far.
+        return {
+            'path': budget.best,
+            'steps': len(budget.best),
+            'time': elapsed_time,
+            'nodes': stats['and_nodes'],
+            'belief_stats': stats,
+            'stuck': True,
+            'exhausted': budget.exhausted
+        }
+    if solution_path is not None:
+        return {
+            'path': solution_path,
+            'steps': len(solution_path),
+            'time': elapsed_time,
+            'nodes': stats['and_nodes'],
+            'belief_stats': stats
+        }
+    else:
+        return None
+
+# And-Or search runs as depth-bounded passes with an explicit stack, so no
+# depth can hit the recursion limit. By default one pass runs at max_depth;
+# with deepening the bound grows from the belief's lower bound (the most
+# minority units of any world) to max_depth, so the first plan found is a
+# shortest one, at the price of many more nodes. Belief states are memoized by signature across passes:
+# solved ones with their plan, failed ones with the largest remaining depth
+# they were proven to fail with. A node is cut when its remaining depth is
+# below its bound or its signature is on the current path; a failure that
+# depended on such a cycle cut is not memoized, since the belief may still
+# succeed when reached by another path. With a budget, each pass records
+# the plan prefix to every belief whose bound beats the best so far, and a
+# stopped search leaves that prefix in budget.best.
+_SOLVED, _FAILED, _OPEN, _STOPPED = range(4)
+
+def _andor_search(initial_belief, stats, max_depth, deepening=False, budget=None):
+    solved = {}
+    failed = {}
+    first_bound = min(initial_belief.bound(), max_depth) if deepening else max_depth
+    for bound in range(first_bound, max_depth + 1):
+        stats['iterations'] += 1
+        status, path = _bounded_andor(initial_belief, bound, solved, failed, stats, budget)
+        if status == _SOLVED:
+            return path
+        if status == _STOPPED:
+            return None
+    return None
+
+def _bounded_andor(root, bound, solved, failed, stats, budget=None):
+    on_path = set()
+    if budget is not None:
+        budget.record(root.bound(), [])
+
+    def open_node(belief, depth):
+        stats['and_nodes'] += 1
+        if budget is not None and not budget.allows(stats['and_nodes']):
+            return _STOPPED, None
+        stats['belief_states_explored'] += 1
+        stats['max_belief_size'] = max(stats['max_belief_size'], belief.size())
+        stats['total_worlds_processed'] += belief.size()
+        signature = belief.signature
+        remaining = bound - depth
+        plan = solved.get(signature)
+        if plan is not None and len(plan) <= remaining:
+            return _SOLVED, plan
+        if belief.is_goal():
+            solved[signature] = ()
+            return _SOLVED, ()
+        if signature in on_path:
+            return _FAILED, True
+        if failed.get(signature, -1) >= remaining:
+            return _FAILED, False
+        if remaining <= 0 or belief.bound() > remaining:
+            failed[signature] = remaining
+            return _FAILED, False
+        children = []
+        for action in belief.get_valid_actions():
+            child = belief.apply_action(action)
+            children.append((child.bound(), action, child))
+        children.sort(key=lambda item: item[0])
+        on_path.add(signature)
+        # [belief, depth, children, next child, failure depends on a cycle cut]
+        return _OPEN, [belief, depth, children, 0, False]
+
+    status, value = open_node(root, 0)
+    if status != _OPEN:
+        return status, (list(value) if status == _SOLVED else None)
+    stack = [value]
+    while stack:
+        frame = stack[-1]
+        belief, depth, children, index, _ = frame
+        if index < len(children):
+            frame[3] += 1
+            stats['or_nodes'] += 1
+            if budget is not None and children[index][0] < budget.best_score:
+                budget.record(children[index][0], [entry[2][entry[3] - 1][1] for entry in stack])
+            status, value = open_node(children[index][2], depth + 1)
+            if status == _OPEN:
+                stack.append(value)
+            elif status == _FAILED:
+                frame[4] = frame[4] or value
+            elif status == _STOPPED:
+                return _STOPPED, None
+            else:
+                path = list(value)
+                for belief, _, children, index, _ in reversed(stack):
+                    path.insert(0, children[index - 1][1])
+                    solved[belief.signature] = tuple(path)
+                return _SOLVED, path
+            continue
+        stack.pop()
+        on_path.discard(belief.signature)
+        if frame[4]:
+            if stack:
+                stack[-1][4] = True
+        else:
+            failed[belief.signature] = max(failed.get(belief.signature, -1), bound - depth)
+    return _FAILED, None
+
+def _solve_andor_classic(initial_state, start_time, stats, budget=None):
+    if budget is not None:
+        budget = budget.run()
+    visited = set()
+    def is_goal(state):
+        return all(len(set(tube)) <= 1 and (len(tube) == 0 or len(tube) == 4) for tube in state)
+    def get_valid_moves(state):
+        moves = []
+        for i in range(len(state)):
+            if not state[i]:
+                continue
+            for j in range(len(state)):
+                if i == j:
+                    continue
+                if len(state[j]) >= 4:
+                    continue
+                if not state[j] or state[j][-1] == state[i][-1]:
+                    moves.append((i, j))
+        return moves
+    def apply_move(state, move):
+        from_idx, to_idx = move
+        new_state = [list(tube) for tube in state]
+        color = new_state[from_idx].pop()
+        new_state[to_idx].append(color)
+        return tuple(tuple(tube) for tube in new_state)
+    def search(initial_state):
+        # Depth-first with an explicit stack, in the order recursion would take.
+        stack = [(initial_state, [])]
+        while stack:
+            state, path = stack.pop()
+            stats['and_nodes'] += 1
+            if budget is not None:
+                budget.record(heuristic(state), path)
+                if not budget.allows(stats['and_nodes']):
+                    return None
+            if is_goal(state):
+                return path
+            if state in visited:
+                continue
+            visited.add(state)
+            for move in reversed(get_valid_moves(state)):
+                stack.append((apply_move(state, move), path + [move]))
+        return None
+    solution = search(initial_state)
+    elapsed_time = time.time() - start_time
+    if budget is not None and budget.exhausted:
+        # The path to the lowest-heuristic state popped so far.
+        return {
+            'path': budget.best,
+            'steps': len(budget.best),
+            'time': elapsed_time,
+            'nodes': stats['and_nodes'],
+            'stuck': True,
+            'exhausted': budget.exhausted
+        }
+    if solution:
+        return {
+            'path': solution,
+            'steps': len(solution),
+            'time': elapsed_time,
+            'nodes': stats['and_nodes']
+        }
+    return None
+
+def solve_andor_search(initial_state, visibility=None, max_depth=30, max_worlds=DEFAULT_BELIEF_WORLDS, deepening=False,
+                       budget=None):
+    is_hidden = visibility is not None and any(not is_visible for tube in visibility for is_visible in tube)
+    return solve_andor_belief_state(initial_state, visibility, is_hidden_mode=is_hidden, max_depth=max_depth,
+                                    max_worlds=max_worlds, deepening=deepening, budget=budget)
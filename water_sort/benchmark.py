@@ -0,0 +1,306 @@
+import argparse
+import contextlib
+import csv
+import io
+import json
+import multiprocessing
+import os
+import queue
+import random
+import sys
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from .state import make_state, is_goal_state, can_pour_on_state, apply_move_on_state
+from .levels import generate_level_colors, visibility_for_mode
+from .registry import SOLVERS, solvers_for_mode
+from .api import solve, SOLVED, STUCK, BUDGET_EXHAUSTED, CANCELLED
+from .pdb import pattern_database_for_state
+
+# --- Benchmark ---
+# Builds a seeded corpus (the same seed always gives the same levels), runs
+# each solver on each level in its own process with a node budget and a hard
+# time limit, and writes one row per (level, solver) to JSON/CSV. With
+# --baseline the run is diffed against an earlier JSON report and the exit
+# status is 1 if anything regressed. --heuristic pdb runs the informed
+# solvers (HEURISTIC_SOLVERS) with the pattern database heuristic; the
+# databases are built before the first run so build time is not measured.
+#
+# peak_memory is tracemalloc's peak in the run's own process. Solvers that
+# start worker processes (parallel_bfs, parallel_a_star, parallel_tempering)
+# also get worker_memory: the peak resident size of the largest of those
+# workers, where the resource module exists (not on Windows). A node count
+# only regresses when it grows by more than node_tolerance, so tie-break
+# changes that expand a few more nodes are not flagged.
+#
+#   python -m water_sort.benchmark --colors 3-6 --json bench.json
+#   python -m water_sort.benchmark --colors 3-6 --baseline bench.json
+#   python -m water_sort.benchmark --solvers a_star,ida_star --heuristic pdb
+DEFAULT_SEED = 2024
+DEFAULT_LEVELS_PER_SIZE = 3
+DEFAULT_TIME_LIMIT = 10.0
+DEFAULT_MAX_NODES = 200000
+DEFAULT_TOLERANCE = 0.25
+DEFAULT_NODE_TOLERANCE = 0.1
+# Time differences below this many seconds are treated as noise.
+MIN_TIME_DELTA = 0.05
+KILL_GRACE = 1.0
+MODES = ("classic", "hidden", "blind")
+HEURISTICS = ("minority", "pdb")
+HEURISTIC_SOLVERS = ("a_star", "ida_star", "greedy")
+CSV_FIELDS = ["level", "mode", "colors", "solver", "status", "steps", "time", "nodes", "nodes_per_sec", "peak_memory",
+              "worker_memory"]
+
+def generate_corpus(seed=DEFAULT_SEED, color_counts=range(3, 9), modes=MODES, levels_per_size=DEFAULT_LEVELS_PER_SIZE):
+    corpus = []
+    for num_colors in color_counts:
+        for k in range(levels_per_size):
+            random.seed(f"{seed}:{num_colors}:{k}")
+            state = make_state(generate_level_colors(num_colors))
+            for mode in modes:
+                corpus.append({
+                    'id': f"{mode}-{num_colors}-{k}",
+                    'mode': mode,
+                    'colors': num_colors,
+                    'state': state,
+                    'visibility': visibility_for_mode(state, mode),
+                })
+    return corpus
+
+def path_solves(state, path):
+    for from_idx, to_idx in path:
+        if not can_pour_on_state(state, from_idx, to_idx):
+            return False
+        state = apply_move_on_state(state, from_idx, to_idx)
+    return is_goal_state(state)
+
+def _run_solver(level, solver, seed, max_nodes, time_limit, track_memory, heuristic="minority"):
+    random.seed(f"{seed}:{level['id']}:{solver}")
+    kwargs = {}
+    if solver == "and_or":
+        kwargs['visibility'] = level['visibility']
+    if heuristic == "pdb" and solver in HEURISTIC_SOLVERS:
+        kwargs['heuristic_engine'] = pattern_database_for_state(level['state'])
+    if track_memory:
+        tracemalloc.start()
+    start_time = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = solve(solver, level['state'], time_limit=time_limit, max_nodes=max_nodes, **kwargs)
+    elapsed = time.perf_counter() - start_time
+    peak_memory = None
+    if track_memory:
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    row = {'status': "unsolved", 'steps': None, 'time': elapsed, 'nodes': result['nodes'], 'peak_memory': peak_memory,
+           'worker_memory': _worker_memory() if track_memory else None}
+    if result['status'] == SOLVED:
+        row['steps'] = result['steps']
+        row['status'] = "solved" if path_solves(level['state'], result['path']) else "invalid"
+    elif result['status'] == STUCK:
+        row['steps'] = result['steps']
+        row['status'] = "stuck"
+    elif result['status'] in (BUDGET_EXHAUSTED, CANCELLED):
+        row['status'] = "budget"
+    return row
+
+def _worker_memory():
+    # Peak RSS in bytes of the largest finished child of this process; this
+    # process is new for every run, so its children are the solver's workers.
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    if not peak:
+        return None
+    return peak if sys.platform == "darwin" else peak * 1024
+
+def _worker(results, level, solver, seed, max_nodes, time_limit, track_memory, heuristic):
+    try:
+        results.put(_run_solver(level, solver, seed, max_nodes, time_limit, track_memory, heuristic))
+    except Exception as e:
+        results.put({'status': "error", 'error': f"{type(e).__name__}: {e}"})
+
+def run_one(level, solver, seed=DEFAULT_SEED, max_nodes=DEFAULT_MAX_NODES, time_limit=DEFAULT_TIME_LIMIT, track_memory=True,
+            heuristic="minority"):
+    results = multiprocessing.Queue()
+    process = multiprocessing.Process(
+        target=_worker, args=(results, level, solver, seed, max_nodes, time_limit, track_memory, heuristic))
+    start_time = time.perf_counter()
+    process.start()
+    row = None
+    try:
+        row = results.get(timeout=None if time_limit is None else time_limit + KILL_GRACE)
+    except queue.Empty:
+        pass
+    if row is None:
+        process.terminate()
+        row = {'status': "timeout", 'steps': None, 'time': time.perf_counter() - start_time, 'nodes': None, 'peak_memory': None,
+               'worker_memory': None}
+    process.join()
+    row.update({'level': level['id'], 'mode': level['mode'], 'colors': level['colors'], 'solver': solver})
+    if row.get('nodes') and row.get('time'):
+        row['nodes_per_sec'] = row['nodes'] / row['time']
+    else:
+        row['nodes_per_sec'] = None
+    return row
+
+def run_benchmark(corpus, solvers=None, seed=DEFAULT_SEED, max_nodes=DEFAULT_MAX_NODES, time_limit=DEFAULT_TIME_LIMIT, track_memory=True,
+                  heuristic="minority"):
+    rows = []
+    if heuristic == "pdb":
+        for level in corpus:
+            if level['mode'] == "classic":
+                pattern_database_for_state(level['state'])
+    for level in corpus:
+        for solver in solvers_for_mode(level['mode']):
+            if solvers is not None and solver not in solvers:
+                continue
+            row = run_one(level, solver, seed, max_nodes, time_limit, track_memory, heuristic)
+            rows.append(row)
+            print(f"{row['level']:<14} {solver:<18} {row['status']:<8} "
+                  f"steps={row['steps']} time={row['time']:.3f}s nodes={row['nodes']}")
+    return rows
+
+# --- Reports ---
+def write_json(path, meta, corpus, rows):
+    levels = [{'id': level['id'], 'mode': level['mode'], 'colors': level['colors'],
+               'state': [[list(color) for color in tube] for tube in level['state']]} for level in corpus]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({'meta': meta, 'levels': levels, 'results': rows}, f, indent=2)
+
+def write_csv(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+
+def print_summary(rows):
+    print(f"\n{'solver':<18} {'solved':>8} {'avg time':>10} {'avg steps':>10} {'nodes/s':>10} {'peak mem':>10} "
+          f"{'worker mem':>10}")
+    for solver in SOLVERS:
+        solver_rows = [row for row in rows if row['solver'] == solver]
+        if not solver_rows:
+            continue
+        solved = [row for row in solver_rows if row['status'] == "solved"]
+        avg_time = sum(row['time'] for row in solver_rows) / len(solver_rows)
+        avg_steps = sum(row['steps'] for row in solved) / len(solved) if solved else 0
+        total_nodes = sum(row['nodes'] or 0 for row in solver_rows)
+        total_time = sum(row['time'] for row in solver_rows if row['nodes'])
+        rate = total_nodes / total_time if total_time else 0
+        peak = max((row['peak_memory'] or 0 for row in solver_rows), default=0)
+        worker_peak = max((row.get('worker_memory') or 0 for row in solver_rows), default=0)
+        worker_text = f"{worker_peak / 1024:>8.0f}KB" if worker_peak else f"{'-':>10}"
+        print(f"{solver:<18} {len(solved):>4}/{len(solver_rows):<3} {avg_time:>10.3f} {avg_steps:>10.1f} "
+              f"{rate:>10.0f} {peak / 1024:>8.0f}KB {worker_text}")
+
+def compare_to_baseline(rows, baseline_rows, tolerance=DEFAULT_TOLERANCE, node_tolerance=DEFAULT_NODE_TOLERANCE):
+    previous = {(row['level'], row['solver']): row for row in baseline_rows}
+    regressions = []
+    improvements = []
+    for row in rows:
+        old = previous.get((row['level'], row['solver']))
+        if old is None:
+            continue
+        name = f"{row['level']} {row['solver']}"
+        if old['status'] == "solved" and row['status'] != "solved":
+            regressions.append(f"{name}: {old['status']} -> {row['status']}")
+            continue
+        if row['status'] == "solved" and old['status'] != "solved":
+            improvements.append(f"{name}: {old['status']} -> {row['status']}")
+            continue
+        if row['status'] != "solved":
+            continue
+        if row['steps'] > old['steps']:
+            regressions.append(f"{name}: steps {old['steps']} -> {row['steps']}")
+        elif row['steps'] < old['steps']:
+            improvements.append(f"{name}: steps {old['steps']} -> {row['steps']}")
+        if row['nodes'] is not None and old['nodes'] is not None:
+            if row['nodes'] > old['nodes'] * (1 + node_tolerance):
+                regressions.append(f"{name}: nodes {old['nodes']} -> {row['nodes']}")
+            elif old['nodes'] > row['nodes'] * (1 + node_tolerance):
+                improvements.append(f"{name}: nodes {old['nodes']} -> {row['nodes']}")
+        delta = row['time'] - old['time']
+        if delta > MIN_TIME_DELTA and row['time'] > old['time'] * (1 + tolerance):
+            regressions.append(f"{name}: time {old['time']:.3f}s -> {row['time']:.3f}s")
+        elif -delta > MIN_TIME_DELTA and old['time'] > row['time'] * (1 + tolerance):
+            improvements.append(f"{name}: time {old['time']:.3f}s -> {row['time']:.3f}s")
+    return regressions, improvements
+
+# --- Command Line ---
+def _parse_range(text):
+    if "-" in text:
+        low, high = text.split("-", 1)
+        return range(int(low), int(high) + 1)
+    return range(int(text), int(text) + 1)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m water_sort.benchmark",
+                                     description="Run the solvers over a seeded level corpus.")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--levels", type=int, default=DEFAULT_LEVELS_PER_SIZE, help="levels per color count")
+    parser.add_argument("--colors", default="3-8", help="color counts, e.g. 3-8 or 5")
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--solvers", default=None, help="comma separated solver keys (default: all)")
+    parser.add_argument("--time-limit", type=float, default=DEFAULT_TIME_LIMIT, help="seconds per run")
+    parser.add_argument("--max-nodes", type=int, default=DEFAULT_MAX_NODES)
+    parser.add_argument("--heuristic", choices=HEURISTICS, default="minority",
+                        help=f"heuristic for {', '.join(HEURISTIC_SOLVERS)}")
+    parser.add_argument("--no-memory", action="store_true", help="skip tracemalloc (faster, no peak memory)")
+    parser.add_argument("--json", help="write the report to this JSON file")
+    parser.add_argument("--csv", help="write the results to this CSV file")
+    parser.add_argument("--baseline", help="JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="allowed relative slowdown")
+    parser.add_argument("--node-tolerance", type=float, default=DEFAULT_NODE_TOLERANCE,
+                        help="allowed relative growth in nodes")
+    args = parser.parse_args(argv)
+
+    modes = [mode for mode in args.modes.split(",") if mode]
+    for mode in modes:
+        if mode not in MODES:
+            parser.error(f"unknown mode: {mode}")
+    solvers = None
+    if args.solvers:
+        solvers = [solver for solver in args.solvers.split(",") if solver]
+        for solver in solvers:
+            if solver not in SOLVERS:
+                parser.error(f"unknown solver: {solver}")
+
+    corpus = generate_corpus(args.seed, _parse_range(args.colors), modes, args.levels)
+    track_memory = not args.no_memory
+    rows = run_benchmark(corpus, solvers, args.seed, args.max_nodes, args.time_limit, track_memory, args.heuristic)
+    print_summary(rows)
+    meta = {
+        'seed': args.seed,
+        'time_limit': args.time_limit,
+        'max_nodes': args.max_nodes,
+        'memory': track_memory,
+        'heuristic': args.heuristic,
+        'python': sys.version.split()[0],
+        'cpus': os.cpu_count(),
+        'date': time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    if args.json:
+        write_json(args.json, meta, corpus, rows)
+    if args.csv:
+        write_csv(args.csv, rows)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline['meta'].get('seed') != args.seed:
+            print(f"Warning: baseline was run with seed {baseline['meta'].get('seed')}, not {args.seed}")
+        regressions, improvements = compare_to_baseline(rows, baseline['results'], args.tolerance, args.node_tolerance)
+        print(f"\nCompared with {args.baseline}: {len(regressions)} regressions, {len(improvements)} improvements")
+        for line in regressions:
+            print(f"  REGRESSION {line}")
+        for line in improvements:
+            print(f"  improved   {line}")
+        if regressions:
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+import time
+
+from .state import make_state
+from .packed import (
+    pack_state, packed_heuristic, packed_successors, packed_predecessors, packed_goal_key, canonical_key
+)
+from .solvers import _partial_result
+
+# --- Bidirectional BFS ---
+# Forward search runs from the level on real tube indices; backward search
+# un-pours from the goal. Every goal arrangement is a permutation of one
+# sorted goal, so both sides key their visited maps by canonical_key and the
+# backward side works directly on sorted (canonical) codes. Layers are
+# expanded whole, smaller frontier first, and the best meeting point of a
+# layer gives an optimal single-unit path.
+def solve_bidirectional_bfs(initial_state, budget=None):
+    start_time = time.time()
+    if budget is not None:
+        budget = budget.run()
+    initial_code, _ = pack_state(make_state(initial_state))
+    num_tubes = len(initial_state)
+    goal_key = packed_goal_key(initial_code, num_tubes)
+    if goal_key is None:
+        return None
+    start_key = canonical_key(initial_code, num_tubes)
+    # key -> (real code, parent key, move, depth)
+    forward = {start_key: (initial_code, None, None, 0)}
+    # key -> (parent key nearer the goal, depth)
+    backward = {goal_key: (None, 0)}
+    forward_frontier = [start_key]
+    backward_frontier = [goal_key]
+    nodes = 0
+    meet_key = start_key if start_key in backward else None
+
+    def forward_path(key):
+        path = []
+        while forward[key][1] is not None:
+            path.append(forward[key][2])
+            key = forward[key][1]
+        path.reverse()
+        return path
+
+    while meet_key is None and forward_frontier and backward_frontier:
+        best_total = None
+        next_frontier = []
+        if len(forward_frontier) <= len(backward_frontier):
+            for key in forward_frontier:
+                nodes += 1
+                code, _, _, depth = forward[key]
+                if budget is not None:
+                    budget.record(packed_heuristic(code, num_tubes), key)
+                    if not budget.allows(nodes):
+                        return _partial_result(forward_path(budget.best), start_time, nodes, budget)
+                for i, j, new_code in packed_successors(code, num_tubes):
+                    new_key = canonical_key(new_code, num_tubes)
+                    if new_key in forward:
+                        continue
+                    forward[new_key] = (new_code, key, (i, j), depth + 1)
+                    next_frontier.append(new_key)
+                    if new_key in backward:
+                        total = depth + 1 + backward[new_key][1]
+                        if best_total is None or total < best_total:
+                            best_total, meet_key = total, new_key
+            forward_frontier = next_frontier
+        else:
+            for key in backward_frontier:
+                nodes += 1
+                if budget is not None and not budget.allows(nodes):
+                    return _partial_result(forward_path(budget.best or start_key), start_time, nodes, budget)
+                depth = backward[key][1]
+                for _, _, parent_code in packed_predecessors(key, num_tubes):
+                    new_key = canonical_key(parent_code, num_tubes)
+                    if new_key in backward:
+                        continue
+                    backward[new_key] = (key, depth + 1)
+                    next_frontier.append(new_key)
+                    if new_key in forward:
+                        total = depth + 1 + forward[new_key][3]
+                        if best_total is None or total < best_total:
+                            best_total, meet_key = total, new_key
+            backward_frontier = next_frontier
+
+    if meet_key is None:
+        return None
+    path = forward_path(meet_key)
+    code = forward[meet_key][0]
+    key = meet_key
+    while backward[key][0] is not None:
+        target_key = backward[key][0]
+        for i, j, new_code in packed_successors(code, num_tubes):
+            if canonical_key(new_code, num_tubes) == target_key:
+                path.append((i, j))
+                code = new_code
+                break
+        key = target_key
+    return {'path': path, 'steps': len(path), 'time': time.time() - start_time, 'nodes': nodes}
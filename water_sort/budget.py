@@ -0,0 +1,88 @@
+import time
+import tracemalloc
+
+# --- Search Budget ---
+# Passed to a solver as budget=...; the solver calls allows(nodes) once per
+# expanded node and gives up as soon as it returns False. The clock, the
+# cancel token (anything with is_set(), e.g. a threading or multiprocessing
+# Event), the memory limit and progress(nodes) are only checked every
+# CLOCK_INTERVAL nodes to keep the call cheap. max_memory is compared with
+# tracemalloc's current size, so it only applies while tracemalloc is on.
+#
+# Solvers also record(score, ref) the states they reach (lower score is
+# better, normally the heuristic); when the budget runs out they return the
+# path to best as a result with 'stuck': True and 'exhausted' set. ref is
+# local to one solver run (an arena index, a path, ...), so every solver
+# starts with budget = budget.run(): a BudgetRun shares the limits, the
+# clock checks and the exhaustion of its budget but keeps its own best, and
+# a budget passed through several solver calls never hands one run's ref to
+# another.
+CLOCK_INTERVAL = 256
+
+class SearchBudget:
+    def __init__(self, max_nodes=None, time_limit=None, progress=None, deadline=None, max_memory=None, cancel=None):
+        if time_limit is not None:
+            limit = time.time() + time_limit
+            deadline = limit if deadline is None else min(deadline, limit)
+        self.max_nodes = max_nodes
+        self.deadline = deadline
+        self.max_memory = max_memory
+        self.cancel = cancel
+        self.progress = progress
+        self.exhausted = None  # None, "nodes", "time", "memory" or "cancelled"
+        self.nodes = 0
+        self.best_score = float('inf')
+        self.best = None
+        self._last_check = 0
+
+    def allows(self, nodes):
+        if self.exhausted:
+            return False
+        if self.max_nodes is not None and nodes > self.max_nodes:
+            return self._exhaust("nodes", nodes)
+        # Also checks when the count restarts (a solver calling another one).
+        if not self._last_check <= nodes < self._last_check + CLOCK_INTERVAL:
+            self._last_check = nodes
+            if self.progress is not None:
+                self.progress(nodes)
+            if self.cancel is not None and self.cancel.is_set():
+                return self._exhaust("cancelled", nodes)
+            if self.deadline is not None and time.time() >= self.deadline:
+                return self._exhaust("time", nodes)
+            if self.max_memory is not None and tracemalloc.get_traced_memory()[0] > self.max_memory:
+                return self._exhaust("memory", nodes)
+        return True
+
+    def record(self, score, ref):
+        if score < self.best_score:
+            self.best_score = score
+            self.best = ref
+
+    def run(self):
+        return BudgetRun(self)
+
+    def _exhaust(self, reason, nodes):
+        self.exhausted = reason
+        self.nodes = nodes
+        return False
+
+class BudgetRun:
+    def __init__(self, budget):
+        self.budget = budget
+        self.best_score = float('inf')
+        self.best = None
+
+    def __getattr__(self, name):
+        # Limits, exhausted, nodes, ... are the budget's.
+        return getattr(self.budget, name)
+
+    def allows(self, nodes):
+        return self.budget.allows(nodes)
+
+    def record(self, score, ref):
+        if score < self.best_score:
+            self.best_score = score
+            self.best = ref
+
+    def run(self):
+        return BudgetRun(self.budget)
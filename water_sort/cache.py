@@ -0,0 +1,180 @@
+import json
+import os
+import sqlite3
+import time
+
+from .state import make_state
+from .packed import pack_state, canonical_permutation, MAX_PACKED_COLORS
+
+# --- Solution Cache ---
+# SQLite table of solution paths keyed by the canonical initial state (tube
+# order and color names removed, see canonical_permutation) and the
+# algorithm with its options. Only solved results are stored: a stuck or
+# cut-short run is never replayed, so a stochastic solver can try again.
+# CACHE_VERSION is part of the key and goes up whenever what a registry
+# entry returns changes (e.g. "bfs" switching to unit pours), so entries
+# written by older code are no longer hit and age out. Paths are stored in canonical tube indices and
+# mapped back to the caller's tube order on lookup, so a shuffled or
+# recolored copy of a level hits the same entry. A visibility option (the
+# And-Or solver in hidden/blind mode) is part of the key, in canonical tube
+# order, so hidden and classic solves never share an entry. Every hit
+# refreshes last_used; once the table grows past max_entries the least
+# recently used rows are dropped. Each process opens its own connection (WAL mode), so
+# GUI and worker processes can share one file. Database errors are reported
+# once and the cache then behaves as always-miss.
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".water_sort", "solutions.sqlite3")
+CACHE_VERSION = 2
+DEFAULT_MAX_ENTRIES = 10000
+CACHE_TIMEOUT = 5.0
+
+def _options_key(algorithm, options, order):
+    # None if the options cannot be part of a key (objects, ...). Visibility
+    # is stored per tube in canonical order, one 0/1 per slot.
+    parts = [f"v{CACHE_VERSION}", algorithm]
+    for name in sorted(options):
+        value = options[name]
+        if name == "visibility" and value is not None:
+            tubes = ["".join("1" if visible else "0" for visible in value[index]) for index in order]
+            parts.append(f"visibility={'|'.join(tubes)}")
+        elif value is not None and not isinstance(value, (bool, int, float, str)):
+            return None
+        else:
+            parts.append(f"{name}={value!r}")
+    return ":".join(parts)
+
+class SolutionCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._connection = None
+        self._pid = None
+        self._broken = False
+
+    def _connect(self):
+        if self._broken:
+            return None
+        if self._connection is not None and self._pid == os.getpid():
+            return self._connection
+        try:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=CACHE_TIMEOUT)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS solutions ("
+                "state TEXT NOT NULL, algorithm TEXT NOT NULL, path TEXT NOT NULL, stats TEXT NOT NULL, "
+                "last_used REAL NOT NULL, PRIMARY KEY (state, algorithm))")
+            connection.execute("CREATE INDEX IF NOT EXISTS solutions_last_used ON solutions (last_used)")
+            connection.commit()
+        except (sqlite3.Error, OSError) as e:
+            self._fail(e)
+            return None
+        self._connection = connection
+        self._pid = os.getpid()
+        return connection
+
+    def _fail(self, error):
+        print(f"Solution cache disabled: {error}")
+        self._broken = True
+        self._connection = None
+
+    def _locate(self, state):
+        state = make_state(state)
+        if len({color for tube in state for color in tube}) > MAX_PACKED_COLORS:
+            return None, None
+        code, _ = pack_state(state)
+        key, order = canonical_permutation(code, len(state))
+        return f"{len(state)}:{key:x}", order
+
+    def get(self, algorithm, state, **options):
+        connection = self._connect()
+        if connection is None:
+            return None
+        key, order = self._locate(state)
+        if key is None:
+            return None
+        name = _options_key(algorithm, options, order)
+        if name is None:
+            return None
+        try:
+            row = connection.execute(
+                "SELECT path, stats FROM solutions WHERE state = ? AND algorithm = ?", (key, name)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            connection.execute(
+                "UPDATE solutions SET last_used = ? WHERE state = ? AND algorithm = ?", (time.time(), key, name))
+            connection.commit()
+        except sqlite3.Error as e:
+            self._fail(e)
+            return None
+        self.hits += 1
+        result = json.loads(row[1])
+        result['path'] = [(order[i], order[j]) for i, j in json.loads(row[0])]
+        result['steps'] = len(result['path'])
+        result['cached'] = True
+        return result
+
+    def put(self, algorithm, state, result, **options):
+        connection = self._connect()
+        if connection is None or not result or result.get('stuck'):
+            return False
+        key, order = self._locate(state)
+        if key is None:
+            return False
+        name = _options_key(algorithm, options, order)
+        if name is None:
+            return False
+        position = {tube: p for p, tube in enumerate(order)}
+        path = [[position[i], position[j]] for i, j in result['path']]
+        stats = {field: value for field, value in result.items()
+                 if field not in ('path', 'cached') and isinstance(value, (bool, int, float, str, type(None)))}
+        try:
+            connection.execute(
+                "INSERT OR REPLACE INTO solutions (state, algorithm, path, stats, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, name, json.dumps(path), json.dumps(stats), time.time()))
+            excess = connection.execute("SELECT COUNT(*) FROM solutions").fetchone()[0] - self.max_entries
+            if excess > 0:
+                connection.execute(
+                    "DELETE FROM solutions WHERE rowid IN "
+                    "(SELECT rowid FROM solutions ORDER BY last_used LIMIT ?)", (excess,))
+            connection.commit()
+        except sqlite3.Error as e:
+            self._fail(e)
+            return False
+        return True
+
+    def clear(self):
+        connection = self._connect()
+        if connection is None:
+            return
+        try:
+            connection.execute("DELETE FROM solutions")
+            connection.commit()
+        except sqlite3.Error as e:
+            self._fail(e)
+
+    def __len__(self):
+        connection = self._connect()
+        if connection is None:
+            return 0
+        try:
+            return connection.execute("SELECT COUNT(*) FROM solutions").fetchone()[0]
+        except sqlite3.Error as e:
+            self._fail(e)
+            return 0
+
+    def close(self):
+        if self._connection is not None and self._pid == os.getpid():
+            self._connection.close()
+        self._connection = None
+
+_default_cache = None
+
+def get_solution_cache():
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = SolutionCache()
+    return _default_cache
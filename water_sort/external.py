@@ -0,0 +1,163 @@
+import heapq
+import os
+import shutil
+import tempfile
+import time
+
+from .state import make_state
+from .packed import (
+    TUBE_BITS, pack_state, packed_is_goal, packed_heuristic, packed_macro_successors, expand_macro_path,
+    state_key_function
+)
+
+# --- External-Memory BFS ---
+# BFS over macro pours that keeps its layers on disk instead of in a visited
+# set. Layer d is a file of sorted, distinct canonical keys, each written as
+# a fixed-width big-endian record so byte order is numeric order. Building
+# layer d + 1 streams layer d and collects the children's keys in a buffer
+# of at most memory_states keys; every full buffer is sorted and written as
+# a run. The runs are then merged (dropping repeats) against a merge of all
+# earlier layers, which removes states already seen: duplicate detection is
+# delayed until the whole layer is known, and at no point does more than
+# one buffer plus one record per open file sit in memory.
+#
+# The path is rebuilt backwards: scan layer d - 1 for a state that has the
+# goal's key among its children, then layer d - 2 for that state, and so on.
+# Keys only have their tubes sorted (colors keep their names, unlike the
+# relabelled keys), so the chain of keys can be replayed from the real initial state to
+# recover moves in its tube order. Results carry 'layers', the number of
+# states at each depth.
+DEFAULT_MEMORY_STATES = 1 << 20
+READ_RECORDS = 4096
+
+def _record_size(num_tubes):
+    return num_tubes * TUBE_BITS // 8
+
+def _write_keys(path, keys, size):
+    count = 0
+    with open(path, "wb") as f:
+        previous = None
+        for key in keys:
+            if key != previous:
+                f.write(key.to_bytes(size, "big"))
+                count += 1
+                previous = key
+    return count
+
+def _read_keys(path, size):
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(size * READ_RECORDS)
+            if not block:
+                return
+            for offset in range(0, len(block), size):
+                yield int.from_bytes(block[offset:offset + size], "big")
+
+def _unseen(candidates, seen):
+    # Both streams sorted; yields the candidates missing from seen.
+    seen = iter(seen)
+    current = next(seen, None)
+    for key in candidates:
+        while current is not None and current < key:
+            current = next(seen, None)
+        if key != current:
+            yield key
+
+def solve_bfs_external(initial_state, directory=None, memory_states=DEFAULT_MEMORY_STATES, budget=None):
+    start_time = time.time()
+    if budget is not None:
+        budget = budget.run()
+    initial_state = make_state(initial_state)
+    num_tubes = len(initial_state)
+    initial_code, _ = pack_state(initial_state)
+    state_key = state_key_function(num_tubes, canonical=True)
+    size = _record_size(num_tubes)
+    work_dir = tempfile.mkdtemp(prefix="water_sort_bfs_", dir=directory)
+    layer_paths = []
+    layer_sizes = []
+
+    def layer_path(depth):
+        return os.path.join(work_dir, f"layer-{depth}.bin")
+
+    def key_chain(depth, key):
+        chain = [key]
+        for previous in range(depth - 1, -1, -1):
+            for code in _read_keys(layer_paths[previous], size):
+                if any(state_key(new_code) == chain[-1] for *_, new_code in packed_macro_successors(code, num_tubes)):
+                    chain.append(code)
+                    break
+        chain.reverse()
+        return chain
+
+    def replay(chain):
+        code = initial_code
+        moves = []
+        for key in chain[1:]:
+            for i, j, amount, new_code in packed_macro_successors(code, num_tubes):
+                if state_key(new_code) == key:
+                    moves.append((i, j, amount))
+                    code = new_code
+                    break
+        return moves
+
+    def result(depth, key, nodes, **extra):
+        moves = replay(key_chain(depth, key))
+        path = expand_macro_path(moves)
+        found = {'path': path, 'steps': len(path), 'time': time.time() - start_time, 'nodes': nodes,
+                 'pours': len(moves), 'layers': list(layer_sizes)}
+        found.update(extra)
+        return found
+
+    try:
+        start_key = state_key(initial_code)
+        layer_paths.append(layer_path(0))
+        layer_sizes.append(_write_keys(layer_paths[0], [start_key], size))
+        if packed_is_goal(start_key, num_tubes):
+            return result(0, start_key, 1)
+        nodes = 0
+        depth = 0
+        while layer_sizes[-1]:
+            runs = []
+            buffer = []
+
+            def flush():
+                run = os.path.join(work_dir, f"run-{depth + 1}-{len(runs)}.bin")
+                buffer.sort()
+                _write_keys(run, buffer, size)
+                runs.append(run)
+                buffer.clear()
+
+            for code in _read_keys(layer_paths[depth], size):
+                nodes += 1
+                if budget is not None:
+                    budget.record(packed_heuristic(code, num_tubes), (depth, code))
+                    if not budget.allows(nodes):
+                        best_depth, best_key = budget.best
+                        return result(best_depth, best_key, nodes, stuck=True, exhausted=budget.exhausted)
+                for *_, new_code in packed_macro_successors(code, num_tubes):
+                    buffer.append(state_key(new_code))
+                    if len(buffer) >= memory_states:
+                        flush()
+            if buffer:
+                flush()
+            merged = heapq.merge(*(_read_keys(run, size) for run in runs))
+            seen = heapq.merge(*(_read_keys(path, size) for path in layer_paths))
+            goal = None
+
+            def new_keys():
+                nonlocal goal
+                for key in _unseen(merged, seen):
+                    if goal is None and packed_is_goal(key, num_tubes):
+                        goal = key
+                    yield key
+
+            depth += 1
+            layer_paths.append(layer_path(depth))
+            layer_sizes.append(_write_keys(layer_paths[depth], new_keys(), size))
+            for run in runs:
+                os.remove(run)
+            if goal is not None:
+                return result(depth, goal, nodes)
+        return None
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
@@ -0,0 +1,30 @@
+from .packed import TUBE_BITS, TUBE_MASK, tube_info, packed_heuristic
+
+# --- Heuristic Engine ---
+# The heuristic is a sum of per-tube terms (units not of the tube's majority
+# color), so a move only changes the terms of its two tubes. The engine
+# updates a parent's score from those two tubes; per-tube terms come from
+# the tube_info table, which is bounded by the number of possible tube codes.
+# cache_size bounds the memo tables of subclasses (see pdb.py).
+DEFAULT_TUBE_CACHE_SIZE = 1 << 16
+
+class HeuristicEngine:
+    def __init__(self, cache_size=DEFAULT_TUBE_CACHE_SIZE):
+        self.cache_size = cache_size
+
+    def evaluate_packed(self, code, num_tubes):
+        return packed_heuristic(code, num_tubes)
+
+    def packed_after_move(self, score, code, new_code, from_idx, to_idx):
+        for idx in (from_idx, to_idx):
+            shift = idx * TUBE_BITS
+            score += tube_info((new_code >> shift) & TUBE_MASK)[4] - tube_info((code >> shift) & TUBE_MASK)[4]
+        return score
+
+_default_engine = None
+
+def get_heuristic_engine():
+    global _default_engine
+    if _default_engine is None:
+        _default_engine = HeuristicEngine()
+    return _default_engine
@@ -0,0 +1,114 @@
+import time
+from array import array
+
+from .state import make_state
+from .packed import pack_state, packed_is_goal, expand_macro_path, state_key_function
+from .heuristics import get_heuristic_engine
+from .solvers import _successor_function, _search_result, _partial_result
+
+# --- IDA* ---
+# Depth-first iterations with an f = g + h bound, run on an explicit stack so
+# deep levels never hit the recursion limit. A fixed-size transposition table
+# (indexed by a multiplicative hash of the key, always replaced) holds each key with the g
+# and iteration it was last reached at, plus a learned lower bound: when a
+# node's subtree is finished, the smallest child f minus g is stored as its h
+# for later iterations. A node already reached in the same iteration at a
+# lower or equal g is skipped. Memory stays at table_size entries plus the
+# current path.
+DEFAULT_TABLE_SIZE = 1 << 18
+DEAD_END = 0xFFFF
+_HASH_MULTIPLIER = 0x9E3779B97F4A7C15
+
+def _table_slot(key, mask):
+    # Packed keys have long runs of zero low bits (empty tubes sort first).
+    return ((hash(key) * _HASH_MULTIPLIER) >> 32) & mask
+
+def solve_ida_star(initial_state, canonical=True, relabel_colors=False, macro=True,
+                   heuristic_engine=None, table_size=DEFAULT_TABLE_SIZE, budget=None):
+    start_time = time.time()
+    if budget is not None:
+        budget = budget.run()
+    initial_code, _ = pack_state(make_state(initial_state))
+    num_tubes = len(initial_state)
+    state_key = state_key_function(num_tubes, canonical, relabel_colors)
+    successors = _successor_function(num_tubes, macro)
+    engine = heuristic_engine or get_heuristic_engine()
+    if table_size & (table_size - 1):
+        raise ValueError("table_size must be a power of two")
+    mask = table_size - 1
+    table_keys = [None] * table_size
+    table_g = array('H', [0]) * table_size
+    table_h = array('H', [0]) * table_size
+    table_iteration = array('I', [0]) * table_size
+    initial_key = state_key(initial_code)
+    initial_h = engine.evaluate_packed(initial_code, num_tubes)
+    bound = initial_h
+    iteration = 0
+    nodes = 0
+
+    while bound < DEAD_END:
+        iteration += 1
+        next_bound = DEAD_END
+        slot = _table_slot(initial_key, mask)
+        if table_keys[slot] != initial_key:
+            table_keys[slot], table_h[slot] = initial_key, initial_h
+        table_g[slot], table_iteration[slot] = 0, iteration
+        path = []
+        # frame: [code, key, g, static h, sorted children or None, next child index, smallest child f]
+        stack = [[initial_code, initial_key, 0, initial_h, None, 0, DEAD_END]]
+        while stack:
+            frame = stack[-1]
+            code, key, g, h, children, index, min_f = frame
+            if children is None:
+                nodes += 1
+                if packed_is_goal(code, num_tubes):
+                    result = _search_result(path, start_time, nodes)
+                    result['iterations'] = iteration
+                    return result
+                if budget is not None:
+                    if h < budget.best_score:
+                        budget.record(h, path[:])
+                    if not budget.allows(nodes):
+                        return _partial_result(expand_macro_path(budget.best), start_time, nodes, budget)
+                children = []
+                for i, j, amount, new_code in successors(code):
+                    child_key = state_key(new_code)
+                    child_h = engine.packed_after_move(h, code, new_code, i, j)
+                    lower_bound = child_h
+                    slot = _table_slot(child_key, mask)
+                    if table_keys[slot] == child_key and table_h[slot] > lower_bound:
+                        lower_bound = table_h[slot]
+                    if lower_bound < DEAD_END:
+                        children.append((g + amount + lower_bound, lower_bound, amount, i, j, new_code, child_key, child_h))
+                children.sort()
+                frame[4] = children
+            if index >= len(children):
+                stack.pop()
+                slot = _table_slot(key, mask)
+                learned_h = DEAD_END if min_f >= DEAD_END else min_f - g
+                if table_keys[slot] == key and learned_h > table_h[slot]:
+                    table_h[slot] = learned_h
+                if stack:
+                    path.pop()
+                    if min_f < stack[-1][6]:
+                        stack[-1][6] = min_f
+                continue
+            frame[5] = index + 1
+            f, _, amount, i, j, new_code, child_key, child_h = children[index]
+            child_g = g + amount
+            slot = _table_slot(child_key, mask)
+            if f < min_f:
+                frame[6] = f
+            if f > bound:
+                if f < next_bound:
+                    next_bound = f
+                continue
+            if table_iteration[slot] == iteration and table_g[slot] <= child_g and table_keys[slot] == child_key:
+                continue
+            if table_keys[slot] != child_key:
+                table_keys[slot], table_h[slot] = child_key, child_h
+            table_g[slot], table_iteration[slot] = child_g, iteration
+            path.append((i, j, amount))
+            stack.append([new_code, child_key, child_g, child_h, None, 0, DEAD_END])
+        bound = next_bound
+    return None
@@ -0,0 +1,53 @@
+import random
+
+from .state import ALL_COLORS, CAPACITY
+
+# --- Level Generation ---
+NUM_EMPTY_TUBES = 2
+MAX_COLOR_TUBES = 8
+
+def generate_level_colors(num_color_tubes):
+    num_empty_tubes = NUM_EMPTY_TUBES
+    capacity = CAPACITY
+    if num_color_tubes > MAX_COLOR_TUBES:
+        num_color_tubes = MAX_COLOR_TUBES
+    if num_color_tubes > len(ALL_COLORS):
+        num_color_tubes = len(ALL_COLORS)
+    level_colors = ALL_COLORS[:num_color_tubes]
+    solved_state_colors = [[color] * capacity for color in level_colors]
+    for _ in range(num_empty_tubes): solved_state_colors.append([])
+    num_shuffles = 25 * num_color_tubes
+    shuffled_state = [list(t) for t in solved_state_colors]
+    for _ in range(num_shuffles):
+        try:
+            non_empty_indices = [i for i, t in enumerate(shuffled_state) if t]
+            from_idx = random.choice(non_empty_indices)
+            non_full_indices = [i for i, t in enumerate(shuffled_state) if len(t) < capacity and i != from_idx]
+            to_idx = random.choice(non_full_indices)
+            color_to_move = shuffled_state[from_idx].pop()
+            shuffled_state[to_idx].append(color_to_move)
+        except IndexError:
+            continue
+    all_balls = []
+    for tube in shuffled_state: all_balls.extend(tube)
+    random.shuffle(all_balls)
+    final_state_colors = [[] for _ in range(num_color_tubes)]
+    for ball in all_balls:
+        while True:
+            target_idx = random.randrange(num_color_tubes)
+            if len(final_state_colors[target_idx]) < capacity:
+                final_state_colors[target_idx].append(ball)
+                break
+    for _ in range(num_empty_tubes): final_state_colors.append([])
+    return final_state_colors
+
+def visibility_for_mode(state, game_mode="classic"):
+    visibility = []
+    for tube in state:
+        if game_mode == "blind":
+            visibility.append(tuple(False for _ in tube))
+        elif game_mode == "hidden":
+            visibility.append(tuple(i == len(tube) - 1 for i in range(len(tube))))
+        else:
+            visibility.append(tuple(True for _ in tube))
+    return tuple(visibility)
@@ -0,0 +1,282 @@
+from .state import CAPACITY
+
+# --- Packed State Encoding ---
+# Each slot holds a color index (1..15, 0 = empty) in SLOT_BITS bits, each tube
+# takes CAPACITY slots (bottom slot in the low bits) and tube i sits at bit
+# offset i * TUBE_BITS of a single Python int.
+SLOT_BITS = 4
+TUBE_BITS = SLOT_BITS * CAPACITY
+SLOT_MASK = (1 << SLOT_BITS) - 1
+TUBE_MASK = (1 << TUBE_BITS) - 1
+MAX_PACKED_COLORS = SLOT_MASK
+
+_TUBE_INFO = {}
+
+def pack_state(state):
+    palette = []
+    index = {}
+    code = 0
+    for i, tube in enumerate(state):
+        for slot, color in enumerate(tube):
+            if color not in index:
+                palette.append(color)
+                index[color] = len(palette)
+                if len(palette) > MAX_PACKED_COLORS:
+                    raise ValueError(f"Packed states support at most {MAX_PACKED_COLORS} colors")
+            code |= index[color] << (i * TUBE_BITS + slot * SLOT_BITS)
+    return code, tuple(palette)
+
+def unpack_state(code, num_tubes, palette):
+    state = []
+    for tube_code in split_tubes(code, num_tubes):
+        tube = []
+        while tube_code:
+            tube.append(palette[(tube_code & SLOT_MASK) - 1])
+            tube_code >>= SLOT_BITS
+        state.append(tuple(tube))
+    return tuple(state)
+
+def split_tubes(code, num_tubes):
+    return [(code >> (i * TUBE_BITS)) & TUBE_MASK for i in range(num_tubes)]
+
+def join_tubes(tube_codes):
+    code = 0
+    for i, tube_code in enumerate(tube_codes):
+        code |= tube_code << (i * TUBE_BITS)
+    return code
+
+def tube_info(tube_code):
+    # (length, top color index, top run length, is complete, minority units)
+    info = _TUBE_INFO.get(tube_code)
+    if info is None:
+        slots = []
+        rest = tube_code
+        while rest:
+            slots.append(rest & SLOT_MASK)
+            rest >>= SLOT_BITS
+        length = len(slots)
+        if not length:
+            info = (0, 0, 0, True, 0)
+        else:
+            top = slots[-1]
+            run = 0
+            for color in reversed(slots):
+                if color != top:
+                    break
+                run += 1
+            most_common = max(slots.count(color) for color in set(slots))
+            info = (length, top, run, length == CAPACITY and run == CAPACITY, length - most_common)
+        _TUBE_INFO[tube_code] = info
+    return info
+
+def packed_is_goal(code, num_tubes):
+    for i in range(num_tubes):
+        if not tube_info((code >> (i * TUBE_BITS)) & TUBE_MASK)[3]:
+            return False
+    return True
+
+def packed_heuristic(code, num_tubes):
+    total_score = 0
+    for i in range(num_tubes):
+        total_score += tube_info((code >> (i * TUBE_BITS)) & TUBE_MASK)[4]
+    return total_score
+
+def packed_apply_move(code, num_tubes, from_idx, to_idx):
+    if from_idx == to_idx or not (0 <= from_idx < num_tubes and 0 <= to_idx < num_tubes):
+        return None
+    length_i, top_i = tube_info((code >> (from_idx * TUBE_BITS)) & TUBE_MASK)[:2]
+    length_j, top_j = tube_info((code >> (to_idx * TUBE_BITS)) & TUBE_MASK)[:2]
+    if not length_i or length_j >= CAPACITY or (length_j and top_j != top_i):
+        return None
+    return (code - (top_i << (from_idx * TUBE_BITS + (length_i - 1) * SLOT_BITS))
+            + (top_i << (to_idx * TUBE_BITS + length_j * SLOT_BITS)))
+
+def packed_successors(code, num_tubes):
+    infos = [tube_info((code >> (i * TUBE_BITS)) & TUBE_MASK) for i in range(num_tubes)]
+    children = []
+    for i in range(num_tubes):
+        length_i, top_i = infos[i][0], infos[i][1]
+        if not length_i:
+            continue
+        removed = code - (top_i << (i * TUBE_BITS + (length_i - 1) * SLOT_BITS))
+        for j in range(num_tubes):
+            if i == j:
+                continue
+            length_j, top_j = infos[j][0], infos[j][1]
+            if length_j >= CAPACITY or (length_j and top_j != top_i):
+                continue
+            children.append((i, j, removed + (top_i << (j * TUBE_BITS + length_j * SLOT_BITS))))
+    return children
+
+# --- Symmetry Reduction ---
+# Keys for visited/closed sets. Tube order never matters for solvability, so
+# the canonical key sorts tube codes; with relabel_colors the colors are also
+# renamed by canonical_permutation, so any tube order and any renaming of the
+# colors give the same key and a relabeled key never tells apart two states
+# the plain key would merge. Every key is itself a relabelled permutation of
+# the state it came from, so equal keys always mean equivalent states.
+def canonical_key(code, num_tubes, relabel_colors=False):
+    if relabel_colors:
+        return canonical_permutation(code, num_tubes)[0]
+    return join_tubes(sorted(split_tubes(code, num_tubes)))
+
+# The relabeled key (and the cache) needs a true canonical form, so
+# canonical_permutation labels colors by refinement:
+# each color is described by the tubes and slots it sits in (seen through
+# the current color classes) until the classes stop splitting. Colors still
+# tied are tried one at a time and the smallest key wins; colors that can
+# be swapped without changing the level give the same key, so only one of
+# them is tried.
+def _refine_colors(tubes, ranks):
+    while True:
+        places = {}
+        for tube in tubes:
+            seen = tuple(ranks[color] for color in tube)
+            for slot, color in enumerate(tube):
+                places.setdefault(color, []).append((seen, slot))
+        signature = {color: (ranks[color], tuple(sorted(places[color]))) for color in ranks}
+        values = sorted(set(signature.values()))
+        if len(values) == len(set(ranks.values())):
+            return ranks
+        index = {value: rank for rank, value in enumerate(values)}
+        ranks = {color: index[signature[color]] for color in ranks}
+
+def _swap_keeps_level(tubes, a, b):
+    swap = {a: b, b: a}
+    swapped = sorted(tuple(swap.get(color, color) for color in tube) for tube in tubes)
+    return swapped == sorted(tubes)
+
+def _canonical_colors(tubes, ranks):
+    # (sorted relabeled tube codes, color -> new label) for the smallest key
+    ranks = _refine_colors(tubes, ranks)
+    classes = {}
+    for color, rank in ranks.items():
+        classes.setdefault(rank, []).append(color)
+    tied = [classes[rank] for rank in sorted(classes) if len(classes[rank]) > 1]
+    if not tied:
+        mapping = {color: rank + 1 for color, rank in ranks.items()}
+        codes = sorted(sum(mapping[color] << (slot * SLOT_BITS) for slot, color in enumerate(tube))
+                       for tube in tubes)
+        return codes, mapping
+    best = None
+    tried = []
+    for color in sorted(tied[0]):
+        if any(_swap_keeps_level(tubes, color, other) for other in tried):
+            continue
+        tried.append(color)
+        split = {other: 2 * rank + (other != color and rank == ranks[color]) for other, rank in ranks.items()}
+        candidate = _canonical_colors(tubes, split)
+        if best is None or candidate[0] < best[0]:
+            best = candidate
+    return best
+
+def canonical_permutation(code, num_tubes):
+    # (key, order): tube p of the key is tube order[p] of code. Any tube
+    # order and any renaming of the colors of a level give the same key.
+    tube_codes = split_tubes(code, num_tubes)
+    tubes = []
+    for tube_code in tube_codes:
+        tube = []
+        while tube_code:
+            tube.append(tube_code & SLOT_MASK)
+            tube_code >>= SLOT_BITS
+        tubes.append(tuple(tube))
+    ranks = {color: 0 for tube in tubes for color in tube}
+    _, mapping = _canonical_colors(tubes, ranks)
+    relabeled = [sum(mapping[color] << (slot * SLOT_BITS) for slot, color in enumerate(tube)) for tube in tubes]
+    order = sorted(range(num_tubes), key=lambda k: relabeled[k])
+    return join_tubes([relabeled[k] for k in order]), order
+
+def state_key_function(num_tubes, canonical=False, relabel_colors=False):
+    if not canonical and not relabel_colors:
+        return lambda code: code
+    return lambda code: canonical_key(code, num_tubes, relabel_colors)
+
+# --- Macro Moves ---
+# A macro move pours the whole top run of the source (as far as the
+# destination has room), like Tube.transfer_to. Provably dominated moves are
+# skipped: pouring out of a completed tube, pouring a single-colored tube into
+# an empty one (that only swaps tubes) and pouring into any empty tube but the
+# first (all empty destinations are equivalent).
+_RUN_UNITS = [sum(1 << (slot * SLOT_BITS) for slot in range(amount)) for amount in range(CAPACITY + 1)]
+
+def packed_macro_successors(code, num_tubes):
+    infos = [tube_info((code >> (i * TUBE_BITS)) & TUBE_MASK) for i in range(num_tubes)]
+    first_empty = -1
+    for j in range(num_tubes):
+        if not infos[j][0]:
+            first_empty = j
+            break
+    children = []
+    for i in range(num_tubes):
+        length_i, top_i, run_i, done_i = infos[i][:4]
+        if not length_i or done_i:
+            continue
+        for j in range(num_tubes):
+            if i == j:
+                continue
+            length_j, top_j = infos[j][0], infos[j][1]
+            if length_j >= CAPACITY:
+                continue
+            if length_j:
+                if top_j != top_i:
+                    continue
+            elif j != first_empty or run_i == length_i:
+                continue
+            amount = min(run_i, CAPACITY - length_j)
+            units = top_i * _RUN_UNITS[amount]
+            new_code = (code - (units << (i * TUBE_BITS + (length_i - amount) * SLOT_BITS))
+                        + (units << (j * TUBE_BITS + length_j * SLOT_BITS)))
+            children.append((i, j, amount, new_code))
+    return children
+
+def expand_macro_path(macro_moves):
+    path = []
+    for from_idx, to_idx, amount in macro_moves:
+        path.extend([(from_idx, to_idx)] * amount)
+    return path
+
+# What a player counts: repeats of one unit pour in a row are one pour, as
+# the second can only continue a run the first left behind.
+def count_pours(path):
+    return sum(1 for k, move in enumerate(path) if k == 0 or path[k - 1] != move)
+
+# --- Reverse Moves ---
+# Un-pours a single unit: the top unit of to_idx goes back onto from_idx,
+# which is only a legal predecessor if to_idx was empty or showed the same
+# color before the pour. Yields (from_idx, to_idx, predecessor) so that the
+# forward move (from_idx, to_idx) leads from predecessor to code.
+def packed_predecessors(code, num_tubes):
+    infos = [tube_info((code >> (i * TUBE_BITS)) & TUBE_MASK) for i in range(num_tubes)]
+    parents = []
+    for j in range(num_tubes):
+        length_j, top_j, run_j = infos[j][:3]
+        if not length_j or (length_j > 1 and run_j < 2):
+            continue
+        removed = code - (top_j << (j * TUBE_BITS + (length_j - 1) * SLOT_BITS))
+        for i in range(num_tubes):
+            if i == j:
+                continue
+            length_i = infos[i][0]
+            if length_i >= CAPACITY:
+                continue
+            parents.append((i, j, removed + (top_j << (i * TUBE_BITS + length_i * SLOT_BITS))))
+    return parents
+
+def packed_goal_key(code, num_tubes):
+    counts = {}
+    for tube_code in split_tubes(code, num_tubes):
+        while tube_code:
+            color = tube_code & SLOT_MASK
+            counts[color] = counts.get(color, 0) + 1
+            tube_code >>= SLOT_BITS
+    goal_tubes = []
+    for color, count in counts.items():
+        if count % CAPACITY:
+            return None
+        goal_tubes.extend([color * _RUN_UNITS[CAPACITY]] * (count // CAPACITY))
+    if len(goal_tubes) > num_tubes:
+        return None
+    goal_tubes.extend([0] * (num_tubes - len(goal_tubes)))
+    goal_tubes.sort()
+    return join_tubes(goal_tubes)
@@ -0,0 +1,206 @@
+import heapq
+import multiprocessing
+import os
+import queue
+import time
+
+from .state import make_state
+from .packed import pack_state, packed_is_goal, packed_heuristic, packed_macro_successors, expand_macro_path
+from .heuristics import HeuristicEngine, get_heuristic_engine
+
+# --- Hash-Distributed Search ---
+# Parallel A* in the style of HDA*: every state has an owner process,
+# hash(code) % workers, which holds that state's entry in the open list, its
+# best g and its parent pointer. A worker that generates a child owned by
+# someone else ships it to the owner in a batch instead of inserting it.
+#
+# Work proceeds in synchronous rounds driven by the calling process. In each
+# round every worker expands its open nodes with f <= bound (the smallest f
+# left anywhere), at most ROUND_NODES of them, sends one batch to every other
+# worker and inserts the batches it receives, then reports its smallest f,
+# its best goal and its node count. Since all batches are delivered before
+# the reports, the reports describe every open node, which makes termination
+# simple: stop once the cheapest goal costs no more than the smallest f
+# (optimal for an admissible heuristic, like solve_a_star) or nothing is
+# left open. The path is rebuilt by asking each owner for the parent of the
+# next state back.
+#
+# solve_parallel_bfs is the same search with zero heuristic and cost 1 per
+# pour, i.e. BFS layers over macro pours. The best state reported for a
+# budget's partial path is scored with packed_heuristic, not the search
+# heuristic, so BFS still returns a path towards the most sorted state.
+# Workers exit on their own when the calling process dies, so cancelling a
+# job by terminating it is safe.
+ROUND_NODES = 2000
+PARENT_POLL = 0.5
+
+class ZeroHeuristic(HeuristicEngine):
+    def evaluate_packed(self, code, num_tubes):
+        return 0
+
+    def packed_after_move(self, score, code, new_code, from_idx, to_idx):
+        return 0
+
+def _owner(code, num_workers):
+    return hash(code) % num_workers
+
+def _search_worker(index, num_workers, num_tubes, engine, unit_cost, connection, inboxes):
+    parent = multiprocessing.parent_process()
+    for inbox in inboxes:
+        # Batches are always consumed before the next round, so only an
+        # aborted search can leave data behind; never block exit on it.
+        inbox.cancel_join_thread()
+    open_list = []
+    best_g = {}
+    parents = {}
+    goal = None
+    best = None
+
+    def offer(code, g, parent_code, move):
+        nonlocal goal, best
+        if code in best_g and best_g[code] <= g:
+            return
+        best_g[code] = g
+        parents[code] = (parent_code, move)
+        if packed_is_goal(code, num_tubes):
+            if goal is None or g < goal[0]:
+                goal = (g, code)
+            return
+        score = packed_heuristic(code, num_tubes)
+        if best is None or score < best[0]:
+            best = (score, code)
+        heapq.heappush(open_list, (g + engine.evaluate_packed(code, num_tubes), g, code))
+
+    def parent_gone():
+        return parent is not None and not parent.is_alive()
+
+    def report(expanded):
+        while open_list and open_list[0][1] > best_g[open_list[0][2]]:
+            heapq.heappop(open_list)
+        connection.send((open_list[0][0] if open_list else None, goal, best, expanded))
+
+    while True:
+        while not connection.poll(PARENT_POLL):
+            if parent_gone():
+                return
+        command = connection.recv()
+        kind = command[0]
+        if kind == "start":
+            if _owner(command[1], num_workers) == index:
+                offer(command[1], 0, None, None)
+            report(0)
+        elif kind == "expand":
+            bound, limit = command[1], command[2]
+            outboxes = [[] for _ in range(num_workers)]
+            expanded = 0
+            while open_list and open_list[0][0] <= bound and expanded < limit:
+                f, g, code = heapq.heappop(open_list)
+                if g > best_g[code]:
+                    continue
+                expanded += 1
+                for i, j, amount, new_code in packed_macro_successors(code, num_tubes):
+                    new_g = g + (amount if unit_cost else 1)
+                    owner = _owner(new_code, num_workers)
+                    if owner == index:
+                        offer(new_code, new_g, code, (i, j, amount))
+                    else:
+                        outboxes[owner].append((new_code, new_g, code, (i, j, amount)))
+            for owner in range(num_workers):
+                if owner != index:
+                    inboxes[owner].put(outboxes[owner])
+            received = 0
+            while received < num_workers - 1:
+                try:
+                    batch = inboxes[index].get(timeout=PARENT_POLL)
+                except queue.Empty:
+                    if parent_gone():
+                        return
+                    continue
+                for item in batch:
+                    offer(*item)
+                received += 1
+            report(expanded)
+        elif kind == "parent":
+            connection.send(parents.get(command[1], (None, None)))
+        else:
+            return
+
+def _hash_distributed_search(initial_state, workers, engine, unit_cost, budget):
+    start_time = time.time()
+    if budget is not None:
+        budget = budget.run()
+    initial_state = make_state(initial_state)
+    num_tubes = len(initial_state)
+    initial_code, _ = pack_state(initial_state)
+    num_workers = max(1, workers or os.cpu_count() or 1)
+    inboxes = [multiprocessing.Queue() for _ in range(num_workers)]
+    connections = []
+    processes = []
+    for index in range(num_workers):
+        connection, child_connection = multiprocessing.Pipe()
+        process = multiprocessing.Process(
+            target=_search_worker,
+            args=(index, num_workers, num_tubes, engine, unit_cost, child_connection, inboxes), daemon=True)
+        process.start()
+        connections.append(connection)
+        processes.append(process)
+
+    def path_to(code):
+        moves = []
+        while True:
+            connection = connections[_owner(code, num_workers)]
+            connection.send(("parent", code))
+            parent_code, move = connection.recv()
+            if parent_code is None:
+                break
+            moves.append(move)
+            code = parent_code
+        moves.reverse()
+        return moves
+
+    try:
+        for connection in connections:
+            connection.send(("start", initial_code))
+        nodes = 0
+        while True:
+            reports = [connection.recv() for connection in connections]
+            nodes += sum(report[3] for report in reports)
+            bounds = [report[0] for report in reports if report[0] is not None]
+            goals = [report[1] for report in reports if report[1] is not None]
+            bound = min(bounds) if bounds else None
+            goal = min(goals) if goals else None
+            if goal is not None and (bound is None or goal[0] <= bound):
+                moves = path_to(goal[1])
+                path = expand_macro_path(moves)
+                return {'path': path, 'steps': len(path), 'time': time.time() - start_time, 'nodes': nodes,
+                        'pours': len(moves), 'workers': num_workers}
+            if bound is None:
+                return None
+            if budget is not None:
+                best = min(report[2] for report in reports if report[2] is not None)
+                budget.record(best[0], best[1])
+                if not budget.allows(nodes):
+                    path = expand_macro_path(path_to(budget.best))
+                    return {'path': path, 'steps': len(path), 'time': time.time() - start_time, 'nodes': nodes,
+                            'stuck': True, 'exhausted': budget.exhausted, 'workers': num_workers}
+            for connection in connections:
+                connection.send(("expand", bound, ROUND_NODES))
+    finally:
+        for connection in connections:
+            try:
+                connection.send(("stop",))
+            except OSError:
+                pass
+        for process in processes:
+            process.join(PARENT_POLL)
+            if process.is_alive():
+                process.terminate()
+        for inbox in inboxes:
+            inbox.close()
+
+def solve_parallel_a_star(initial_state, workers=None, heuristic_engine=None, budget=None):
+    engine = heuristic_engine or get_heuristic_engine()
+    return _hash_distributed_search(initial_state, workers, engine, True, budget)
+
+def solve_parallel_bfs(initial_state, workers=None, budget=None):
+    return _hash_distributed_search(initial_state, workers, ZeroHeuristic(), False, budget)
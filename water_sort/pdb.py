@@ -0,0 +1,248 @@
+import argparse
+import mmap
+import os
+import struct
+import sys
+import time
+
+from .state import CAPACITY, make_state
+from .packed import TUBE_BITS, TUBE_MASK, SLOT_BITS, SLOT_MASK, packed_heuristic
+from .heuristics import HeuristicEngine, DEFAULT_TUBE_CACHE_SIZE
+from .levels import NUM_EMPTY_TUBES, MAX_COLOR_TUBES
+
+# --- Pattern Database ---
+# Abstraction: one or two tracked colors keep their identity, every other
+# unit becomes a wildcard X that can sit on or take any color, and only
+# pours of tracked units cost 1. Pours of X cost nothing, so a top run of X
+# can be spread over the tubes freely. The abstract state is therefore just
+# each tube's "core" (its contents up to the highest tracked unit), sorted,
+# with the two tracked colors interchangeable. Distances to the goal (each
+# tracked color in one full tube) come from a retrograde BFS over cores.
+#
+# A real pour moves one unit of one color, so databases over disjoint color
+# groups add up to an admissible estimate of the units still to pour, the
+# same cost A* and IDA* count. The engine pairs palette colors (1, 2),
+# (3, 4), ... (a leftover color gets a one-color database) and takes the max
+# of that sum and the minority-count heuristic.
+#
+# Files hold a header and the sorted records (core bytes, distance). They
+# are opened with mmap and binary searched, so worker processes share the
+# pages; building takes seconds per level size and happens on first use.
+X = 3
+UNREACHABLE = 255
+FILE_MAGIC = b"WSPDB1"
+HEADER = struct.Struct("<6sBBBI")
+DEFAULT_PDB_DIR = os.path.join(os.path.expanduser("~"), ".water_sort", "pdb")
+
+_CORE_LENGTH = [0] * 256
+_CORE_TOP = [0] * 256
+_CORE_XS = [0] * 256
+_CORE_SWAP = [0] * 256
+for _core in range(256):
+    _length = 0
+    while _core >> (2 * _length):
+        _length += 1
+    _slots = [(_core >> (2 * slot)) & 3 for slot in range(_length)]
+    _CORE_LENGTH[_core] = _length
+    _CORE_TOP[_core] = _slots[-1] if _slots else 0
+    _CORE_XS[_core] = _slots.count(X)
+    _CORE_SWAP[_core] = sum((3 - v if v in (1, 2) else v) << (2 * slot) for slot, v in enumerate(_slots))
+
+def _canonical(cores, tracked):
+    key = sorted(cores)
+    if tracked == 2:
+        swapped = sorted(_CORE_SWAP[core] for core in cores)
+        if swapped < key:
+            key = swapped
+    return bytes(key)
+
+def _pop_top(core):
+    length = _CORE_LENGTH[core]
+    return core & ~(3 << (2 * (length - 1)))
+
+def build_pattern_database(num_tubes, num_colors, tracked):
+    if CAPACITY != 4:
+        raise ValueError("Pattern databases assume CAPACITY == 4")
+    total_x = CAPACITY * (num_colors - tracked)
+    full = [sum(color << (2 * slot) for slot in range(CAPACITY)) for color in range(tracked + 1)]
+    goal = _canonical(full[1:] + [0] * (num_tubes - tracked), tracked)
+    distances = {goal: 0}
+    frontier = [goal]
+    depth = 0
+    while frontier:
+        next_frontier = []
+        for key in frontier:
+            state = list(key)
+            top_xs = total_x - sum(_CORE_XS[core] for core in state)
+            free = sum(CAPACITY - _CORE_LENGTH[core] for core in state)
+            for j in range(num_tubes):
+                core_j = state[j]
+                if not core_j or (j and state[j - 1] == core_j):
+                    continue
+                # Undo a pour of the tracked unit on top of j: the X units
+                # right under it were loose X poured over before it.
+                unit = _CORE_TOP[core_j]
+                rest = _pop_top(core_j)
+                moved_xs = 0
+                while rest and _CORE_TOP[rest] == X:
+                    rest = _pop_top(rest)
+                    moved_xs += 1
+                if not moved_xs and rest and _CORE_TOP[rest] != unit:
+                    continue
+                for i in range(num_tubes):
+                    core_i = state[i]
+                    if i == j or (i and state[i - 1] == core_i and i - 1 != j):
+                        continue
+                    others_free = free - (CAPACITY - _CORE_LENGTH[core_i]) - (CAPACITY - _CORE_LENGTH[core_j])
+                    # The source may have had loose X (now on top of it) buried under the unit.
+                    source = core_i
+                    length = _CORE_LENGTH[core_i]
+                    for buried_xs in range(min(top_xs, CAPACITY - 1 - length) + 1):
+                        if buried_xs:
+                            source |= X << (2 * length)
+                            length += 1
+                        if others_free < top_xs - buried_xs:
+                            continue
+                        parent = state[:]
+                        parent[i] = source | (unit << (2 * length))
+                        parent[j] = rest
+                        parent_key = _canonical(parent, tracked)
+                        if parent_key not in distances:
+                            distances[parent_key] = depth + 1
+                            next_frontier.append(parent_key)
+        frontier = next_frontier
+        depth += 1
+    return distances
+
+def write_pattern_database(path, num_tubes, num_colors, tracked, distances):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(HEADER.pack(FILE_MAGIC, num_tubes, num_colors, tracked, len(distances)))
+        for key in sorted(distances):
+            f.write(key + bytes((min(distances[key], UNREACHABLE),)))
+    os.replace(temp_path, path)
+
+class PatternDatabase:
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.num_tubes, self.num_colors, self.tracked, self.size = HEADER.unpack_from(self._data, 0)
+        if magic != FILE_MAGIC:
+            raise ValueError(f"{path} is not a pattern database")
+        self._record = self.num_tubes + 1
+
+    def distance(self, key):
+        data = self._data
+        record = self._record
+        width = self.num_tubes
+        low, high = 0, self.size
+        while low < high:
+            middle = (low + high) // 2
+            offset = HEADER.size + middle * record
+            probe = data[offset:offset + width]
+            if probe < key:
+                low = middle + 1
+            elif probe > key:
+                high = middle
+            else:
+                return data[offset + width]
+        return UNREACHABLE
+
+    def close(self):
+        self._data.close()
+
+def pattern_database_path(num_tubes, num_colors, tracked, directory=DEFAULT_PDB_DIR):
+    return os.path.join(directory, f"pdb-{num_tubes}-{num_colors}-{tracked}.bin")
+
+def load_pattern_database(num_tubes, num_colors, tracked, directory=DEFAULT_PDB_DIR):
+    path = pattern_database_path(num_tubes, num_colors, tracked, directory)
+    if not os.path.exists(path):
+        print(f"Building pattern database {os.path.basename(path)}...")
+        start_time = time.time()
+        distances = build_pattern_database(num_tubes, num_colors, tracked)
+        write_pattern_database(path, num_tubes, num_colors, tracked, distances)
+        print(f"  {len(distances)} entries in {time.time() - start_time:.1f}s")
+    return PatternDatabase(path)
+
+# --- Pattern Database Heuristic ---
+class PatternDatabaseHeuristic(HeuristicEngine):
+    def __init__(self, num_tubes, num_colors, directory=DEFAULT_PDB_DIR, cache_size=DEFAULT_TUBE_CACHE_SIZE):
+        super().__init__(cache_size)
+        self.num_tubes = num_tubes
+        self.num_colors = num_colors
+        self.directory = directory
+        self.groups = []
+        for first in range(1, num_colors + 1, 2):
+            colors = tuple(range(first, min(first + 2, num_colors + 1)))
+            self.groups.append((colors, load_pattern_database(num_tubes, num_colors, len(colors), directory)))
+        self._cores = {}
+        self._distances = {}
+
+    def _core(self, tube_code, colors):
+        core = self._cores.get((tube_code, colors))
+        if core is None:
+            core = 0
+            length = 0
+            for slot in range(CAPACITY):
+                color = (tube_code >> (slot * SLOT_BITS)) & SLOT_MASK
+                if not color:
+                    break
+                symbol = colors.index(color) + 1 if color in colors else X
+                core |= symbol << (2 * slot)
+                if symbol != X:
+                    length = slot + 1
+            core &= (1 << (2 * length)) - 1
+            self._cores[(tube_code, colors)] = core
+        return core
+
+    def evaluate_packed(self, code, num_tubes):
+        if num_tubes != self.num_tubes:
+            raise ValueError(f"Pattern database is for {self.num_tubes} tubes, not {num_tubes}")
+        tube_codes = [(code >> (i * TUBE_BITS)) & TUBE_MASK for i in range(num_tubes)]
+        total = 0
+        for colors, database in self.groups:
+            key = _canonical([self._core(tube_code, colors) for tube_code in tube_codes], len(colors))
+            distance = self._distances.get(key)
+            if distance is None:
+                distance = database.distance(key)
+                if len(self._distances) >= self.cache_size:
+                    del self._distances[next(iter(self._distances))]
+                self._distances[key] = distance
+            total += distance
+        return max(total, packed_heuristic(code, num_tubes))
+
+    def packed_after_move(self, score, code, new_code, from_idx, to_idx):
+        return self.evaluate_packed(new_code, self.num_tubes)
+
+    def __reduce__(self):
+        # The mmap cannot be pickled; other processes reopen the files.
+        return get_pattern_database_heuristic, (self.num_tubes, self.num_colors, self.directory)
+
+_engines = {}
+
+def get_pattern_database_heuristic(num_tubes, num_colors, directory=DEFAULT_PDB_DIR):
+    key = (num_tubes, num_colors, directory)
+    if key not in _engines:
+        _engines[key] = PatternDatabaseHeuristic(num_tubes, num_colors, directory)
+    return _engines[key]
+
+def pattern_database_for_state(state, directory=DEFAULT_PDB_DIR):
+    state = make_state(state)
+    num_colors = len({color for tube in state for color in tube})
+    return get_pattern_database_heuristic(len(state), num_colors, directory)
+
+# --- Command Line ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m water_sort.pdb",
+                                     description="Build the pattern databases for the standard level sizes.")
+    parser.add_argument("--colors", default=f"3-{MAX_COLOR_TUBES}", help="color counts, e.g. 3-8 or 5")
+    parser.add_argument("--dir", default=DEFAULT_PDB_DIR)
+    args = parser.parse_args(argv)
+    low, _, high = args.colors.partition("-")
+    for num_colors in range(int(low), int(high or low) + 1):
+        get_pattern_database_heuristic(num_colors + NUM_EMPTY_TUBES, num_colors, args.dir)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,50 @@
+from functools import partial
+
+from .solvers import (
+    solve_bfs, solve_dfs, solve_a_star, solve_greedy, solve_beam, solve_sa,
+    solve_hill_climb_restarts, solve_backtracking, solve_abca
+)
+from .bidirectional import solve_bidirectional_bfs
+from .idastar import solve_ida_star
+from .vectorized import solve_bfs_numpy
+from .parallel import solve_parallel_a_star, solve_parallel_bfs
+from .external import solve_bfs_external
+from .tempering import solve_parallel_tempering
+from .belief import solve_blind_mode, solve_andor_search
+
+# --- Solver Registry ---
+# Keys match the GUI button actions. Every solver takes the initial state as
+# its first argument and budget=SearchBudget(...); solve_andor_search also
+# takes visibility=... The GUI ranks results by unit steps, so the plain BFS
+# entry searches single-unit pours and really is shortest in steps; the
+# other BFS variants search whole-run pours (fewest pours, see 'pours').
+SOLVERS = {
+    "bfs": ("BFS", partial(solve_bfs, macro=False)),
+    "bfs_numpy": ("BFS (NumPy)", solve_bfs_numpy),
+    "parallel_bfs": ("Parallel BFS", solve_parallel_bfs),
+    "bfs_external": ("BFS (External)", solve_bfs_external),
+    "dfs": ("DFS", solve_dfs),
+    "a_star": ("A*", solve_a_star),
+    "parallel_a_star": ("Parallel A*", solve_parallel_a_star),
+    "ida_star": ("IDA*", solve_ida_star),
+    "bidirectional_bfs": ("Bidirectional BFS", solve_bidirectional_bfs),
+    "greedy": ("Greedy", solve_greedy),
+    "beam": ("Beam Search", solve_beam),
+    "sa": ("SA", solve_sa),
+    "parallel_tempering": ("Parallel Tempering", solve_parallel_tempering),
+    "hill_climb": ("HC+Restarts", solve_hill_climb_restarts),
+    "backtracking": ("Backtracking", solve_backtracking),
+    "abca": ("ABCA", solve_abca),
+    "and_or": ("And-Or", solve_andor_search),
+    "blind": ("Blind", solve_blind_mode),
+}
+
+# Solvers that start their own worker processes (one per CPU by default).
+MULTIPROCESS_SOLVERS = ("parallel_bfs", "parallel_a_star", "parallel_tempering")
+
+def solvers_for_mode(game_mode):
+    if game_mode == "hidden":
+        return ["and_or"]
+    if game_mode == "blind":
+        return ["and_or", "blind"]
+    return [key for key in SOLVERS if key != "blind"]
@@ -0,0 +1,551 @@
+import random
+import time
+import heapq
+import math
+from array import array
+from collections import deque
+
+from .state import make_state
+from .packed import (
+    pack_state, packed_is_goal, packed_heuristic, packed_apply_move, packed_successors, packed_macro_successors,
+    expand_macro_path, count_pours, state_key_function
+)
+from .heuristics import get_heuristic_engine
+
+# --- All Solvers ---
+# The exhaustive and local searches below work on packed int states (see
+# packed.py); paths are lists of (from_idx, to_idx) tube indices. With
+# macro=True the exhaustive searches expand whole-run pours and return the
+# path expanded to single-unit pours, plus the number of pours made. Every
+# solver takes budget=SearchBudget(...) (see budget.py) and, when it runs
+# out, returns the path to the best state reached with 'stuck': True.
+def _successor_function(num_tubes, macro):
+    if macro:
+        return lambda code: packed_macro_successors(code, num_tubes)
+    return lambda code: [(i, j, 1, new_code) for i, j, new_code in packed_successors(code, num_tubes)]
+
+# Search nodes store only a parent index and a 16-bit move code; the path is
+# rebuilt once, when a goal is reached.
+MAX_ARENA_TUBES = 32
+
+class NodeArena:
+    def __init__(self, num_tubes):
+        if num_tubes > MAX_ARENA_TUBES:
+            raise ValueError(f"NodeArena supports at most {MAX_ARENA_TUBES} tubes")
+        self.parents = array('l', [-1])
+        self.moves = array('H', [0])
+
+    def add(self, parent, from_idx, to_idx, amount):
+        self.parents.append(parent)
+        self.moves.append((from_idx * MAX_ARENA_TUBES + to_idx) * 8 + amount)
+        return len(self.parents) - 1
+
+    def path(self, node):
+        moves = []
+        while node > 0:
+            move_code = self.moves[node]
+            tubes, amount = divmod(move_code, 8)
+            moves.append((tubes // MAX_ARENA_TUBES, tubes % MAX_ARENA_TUBES, amount))
+            node = self.parents[node]
+        moves.reverse()
+        return moves
+
+    def __len__(self):
+        return len(self.parents)
+
+def _search_result(moves, start_time, nodes):
+    path = expand_macro_path(moves)
+    return {'path': path, 'steps': len(path), 'time': time.time() - start_time, 'nodes': nodes,
+            'pours': count_pours(path)}
+
+def _partial_result(path, start_time, nodes, budget):
+    return {'path': path, 'steps': len(path), 'time': time.time() - start_time, 'nodes': nodes,
+            'stuck': True, 'exhausted': budget.exhausted}
+
+def solve_bfs(initial_state, canonical=False, relabel_colors=False, macro=True, budget=None):
+    start_time = time.time()
+    if budget is not None:
+        budget = budget.run()
+    initial_code, _ = pack_state(make_state(initial_state))
+    num_tubes = len(initial_state)
+    state_key = state_key_function(num_tubes, canonical, relabel_colors)
+    successors = _successor_function(num_tubes, macro)
+    arena = NodeArena(num_tubes)
+    queue = deque([(initial_code, 0)])
+    visited = {state_key(initial_code)}
+    nodes = 0
+
+    while queue:
+        code, node = queue.popleft()
+        nodes += 1
+        if packed_is_goal(code, num_tubes):
+            return _search_result(arena.path(node), start_time, nodes)
+        if budget is not None:
+            budget.record(packed_heuristic(code, num_tubes), node)
+            if not budget.allows(nodes):
+                return _partial_result(expand_macro_path(arena.path(budget.best)), start_time, nodes, budget)
+        for i, j, amount, new_code in successors(code):
+            new_key = state_key(new_code)
+            if new_key not in visited:
+                visited.add(new_key)
+                queue.append((new_code, arena.add(node, i, j, amount)))
+    return None
+
+def solve_dfs(initial_state, canonical=False, relabel_colors=False, macro=True, budget=None):
+    start_time = time.time()
+    if budget is not None:
+        budget = budget.run()
+    initial_code, _ = pack_state(make_state(initial_state))
+    num_tubes = len(initial_state)
+    state_key = state_key_function(num_tubes, canonical, relabel_colors)
+    successors = _successor_function(num_tubes, macro)
+    arena = NodeArena(num_tubes)
+    stack = [(initial_code, 0)]
+    visited = {state_key(initial_code)}
+    nodes = 0
+
+    while stack:
+        code, node = stack.pop()
+        nodes += 1
+        if packed_is_goal(code, num_tubes):
+            return _search_result(arena.path(node), start_time, nodes)
+        if budget is not None:
+            budget.record(packed_heuristic(code, num_tubes), node)
+            if not budget.allows(nodes):
+                return _partial_result(expand_macro_path(arena.path(budget.best)), start_time, nodes, budget)
+        children = successors(code)
+        random.shuffle(children)
+        for i, j, amount, new_code in children:
+            new_key = state_key(new_code)
+            if new_key not in visited:
+                visited.add(new_key)
+                stack.append((new_code, arena.add(node, i, j, amount)))
+    return None
+
+def solve_a_star(initial_state, canonical=False, relabel_colors=False, macro=True, heuristic_engine=None,
+                 budget=None):
+    start_time = time.time()
+    if budget is not None:
+        budget = budget.run()
+    initial_code, _ = pack_state(make_state(initial_state))
+    num_tubes = len(initial_state)
+    state_key = state_key_function(num_tubes, canonical, relabel_colors)
+    successors = _successor_function(num_tubes, macro)
+    engine = heuristic_engine or get_heuristic_engine()
+    arena = NodeArena(num_tubes)
+    priority_queue = [(engine.evaluate_packed(initial_code, num_tubes), 0, initial_code, 0)]
+    visited = {state_key(initial_code): 0}
+    nodes = 0
+
+    while priority_queue:
+        f, g, code, node = heapq.heappop(priority_queue)
+        nodes += 1
+        if packed_is_goal(code, num_tubes):
+            return _search_result(arena.path(node), start_time, nodes)
+        if g > visited[state_key(code)]:
+            continue
+        h = f - g
+        if budget is not None:
+            budget.record(h, node)
+            if not budget.allows(nodes):
+                return _partial_result(expand_macro_path(arena.path(budget.best)), start_time, nodes, budget)
+        for i, j, amount, new_code in successors(code):
+            new_g = g + amount
+            new_key = state_key(new_code)
+            if new_key not in visited or new_g < visited[new_key]:
+                visited[new_key] = new_g
+                new_f = new_g + engine.packed_after_move(h, code, new_code, i, j)
+                heapq.heappush(priority_queue, (new_f, new_g, new_code, arena.add(node, i, j, amount)))
+    return None
+
+def solve_greedy(initial_state, canonical=False, relabel_colors=False, macro=True, heuristic_engine=None,
+                 budget=None):
+    start_time = time.time()
+    if budget is not None:
+        budget = budget.run()
+    initial_code, _ = pack_state(make_state(initial_state))
+    num_tubes = len(initial_state)
+    state_key = state_key_function(num_tubes, canonical, relabel_colors)
+    successors = _successor_function(num_tubes, macro)
+    engine = heuristic_engine or get_heuristic_engine()
+    arena = NodeArena(num_tubes)
+    priority_queue = [(engine.evaluate_packed(initial_code, num_tubes), initial_code, 0)]
+    visited = {state_key(initial_code)}
+    nodes = 0
+
+    while priority_queue:
+        h, code, node = heapq.heappop(priority_queue)
+        nodes += 1
+        if packed_is_goal(code, num_tubes):
+            return _search_result(arena.path(node), start_time, nodes)
+        if budget is not None:
+            budget.record(h, node)
+            if not budget.allows(nodes):
+                return _partial_result(expand_macro_path(arena.path(budget.best)), start_time, nodes, budget)
+        for i, j, amount, new_code in successors(code):
+            new_key = state_key(new_code)
+            if new_key not in visited:
+                visited.add(new_key)
+                new_h = engine.packed_after_move(h, code, new_code, i, j)
+                heapq.heappush(priority_queue, (new_h, new_code, arena.add(node, i, j, amount)))
+    return None
+
+# Beam search keeps only the beam_width best states of each depth (by h, or
+# by g + weight * h when a weight is given; g counts poured units like A*),
+# so time and memory grow with beam_width * depth instead of the state
+# space. Children already kept at an earlier depth are dropped and repeats
+# within a depth keep their best entry. Not complete: a narrow beam can
+# prune every way to the goal, in which case it returns None.
+DEFAULT_BEAM_WIDTH = 500
+
+def solve_beam(initial_state, beam_width=DEFAULT_BEAM_WIDTH, weight=None, canonical=False, relabel_colors=False,
+               macro=True, heuristic_engine=None, budget=None):
+    start_time = time.time()
+    if budget is not None:
+        budget = budget.run()
+    initial_code, _ = pack_state(make_state(initial_state))
+    num_tubes = len(initial_state)
+    state_key = state_key_function(num_tubes, canonical, relabel_colors)
+    successors = _successor_function(num_tubes, macro)
+    engine = heuristic_engine or get_heuristic_engine()
+    arena = NodeArena(num_tubes)
+    beam = [(0, engine.evaluate_packed(initial_code, num_tubes), initial_code, 0)]
+    visited = {state_key(initial_code)}
+    nodes = 0
+
+    if packed_is_goal(initial_code, num_tubes):
+        return _search_result([], start_time, 1)
+    while beam:
+        candidates = {}
+        for g, h, code, node in beam:
+            nodes += 1
+            if budget is not None:
+                budget.record(h, node)
+                if not budget.allows(nodes):
+                    return _partial_result(expand_macro_path(arena.path(budget.best)), start_time, nodes, budget)
+            for i, j, amount, new_code in successors(code):
+                new_key = state_key(new_code)
+                if new_key in visited:
+                    continue
+                new_g = g + amount
+                if packed_is_goal(new_code, num_tubes):
+                    return _search_result(arena.path(arena.add(node, i, j, amount)), start_time, nodes)
+                new_h = engine.packed_after_move(h, code, new_code, i, j)
+                score = new_h if weight is None else new_g + weight * new_h
+                if new_key not in candidates or score < candidates[new_key][0]:
+                    candidates[new_key] = (score, new_g, new_h, new_code, node, i, j, amount)
+        kept = heapq.nsmallest(beam_width, candidates.items(), key=lambda item: item[1][:3])
+        beam = []
+        for new_key, (score, new_g, new_h, new_code, node, i, j, amount) in kept:
+            visited.add(new_key)
+            beam.append((new_g, new_h, new_code, arena.add(node, i, j, amount)))
+    return None
+
+def solve_sa(initial_state, heuristic_engine=None, max_iter=10000, budget=None):
+    start_time = time.time()
+    if budget is not None:
+        budget = budget.run()
+    initial_code, _ = pack_state(make_state(initial_state))
+    num_tubes = len(initial_state)
+    engine = heuristic_engine or get_heuristic_engine()
+    initial_h = engine.evaluate_packed(initial_code, num_tubes)
+    current_code = initial_code
+    current_h = initial_h
+    current_path = []
+    T = 1.0
+    cooling_rate = 0.995
+    nodes = 0
+
+    for iter in range(max_iter):
+        nodes += 1
+        if packed_is_goal(current_code, num_tubes):
+            return {'path': current_path, 'steps': len(current_path), 'time': time.time() - start_time, 'nodes': nodes}
+        if budget is not None:
+            if current_h < budget.best_score:
+                budget.record(current_h, current_path[:])
+            if not budget.allows(nodes):
+                return _partial_result(budget.best, start_time, nodes, budget)
+        children = packed_successors(current_code, num_tubes)
+        if not children:
+            current_code = initial_code
+            current_h = initial_h
+            current_path = []
+            T = 1.0
+            continue
+        i, j, new_code = random.choice(children)
+        new_h = engine.packed_after_move(current_h, current_code, new_code, i, j)
+        delta = new_h - current_h
+        if delta < 0 or random.random() < math.exp(-delta / T):
+            current_code = new_code
+            current_h = new_h
+            current_path.append((i, j))
+        T *= cooling_rate
+        if T < 0.001:
+            T = 1.0
+            current_code = initial_code
+            current_h = initial_h
+            current_path = []
+    return None
+
+def solve_hill_climb_restarts(initial_state, heuristic_engine=None, max_restarts=10, max_iterations_per_run=100,
+                              budget=None):
+    start_time = time.time()
+    if budget is not None:
+        budget = budget.run()
+    initial_code, _ = pack_state(make_state(initial_state))
+    num_tubes = len(initial_state)
+    engine = heuristic_engine or get_heuristic_engine()
+    initial_h = engine.evaluate_packed(initial_code, num_tubes)
+    nodes = 0
+    best_path_so_far = []
+    lowest_heuristic_achieved = float('inf')
+
+    for i in range(max_restarts):
+        current_code = initial_code
+        current_heuristic_val = initial_h
+        current_path = []
+        for _ in range(max_iterations_per_run):
+            nodes += 1
+            if packed_is_goal(current_code, num_tubes):
+                return {
+                    'path': current_path,
+                    'steps': len(current_path),
+                    'time': time.time() - start_time,
+                    'nodes': nodes,
+                    'stuck': False
+                }
+            if budget is not None:
+                if current_heuristic_val < budget.best_score:
+                    budget.record(current_heuristic_val, current_path[:])
+                if not budget.allows(nodes):
+                    return _partial_result(budget.best, start_time, nodes, budget)
+            best_next_code = None
+            best_move = None
+            best_heuristic_val = current_heuristic_val
+            for from_idx, to_idx, new_code in packed_successors(current_code, num_tubes):
+                new_heuristic = engine.packed_after_move(current_heuristic_val, current_code, new_code, from_idx, to_idx)
+                if new_heuristic < best_heuristic_val:
+                    best_heuristic_val = new_heuristic
+                    best_next_code = new_code
+                    best_move = (from_idx, to_idx)
+            if best_move is not None:
+                current_code = best_next_code
+                current_heuristic_val = best_heuristic_val
+                current_path.append(best_move)
+            else:
+                break
+        final_heuristic = current_heuristic_val
+        if final_heuristic < lowest_heuristic_achieved:
+            lowest_heuristic_achieved = final_heuristic
+            best_path_so_far = current_path
+    if not best_path_so_far:
+        return None
+    return {
+        'path': best_path_so_far,
+        'steps': len(best_path_so_far),
+        'time': time.time() - start_time,
+        'nodes': nodes,
+        'stuck': True
+    }
+
+def solve_backtracking(initial_state, canonical=False, relabel_colors=False, macro=True, budget=None):
+    start_time = time.time()
+    if budget is not None:
+        budget = budget.run()
+    initial_code, _ = pack_state(make_state(initial_state))
+    num_tubes = len(initial_state)
+    state_key = state_key_function(num_tubes, canonical, relabel_colors)
+    successors = _successor_function(num_tubes, macro)
+    nodes_visited = [0]
+    path_visited = set()
+
+    path = []
+
+    def backtrack_recursive(code):
+        nodes_visited[0] += 1
+        if packed_is_goal(code, num_tubes):
+            return True
+        if budget is not None:
+            h = packed_heuristic(code, num_tubes)
+            if h < budget.best_score:
+                budget.record(h, expand_macro_path(path))
+            if not budget.allows(nodes_visited[0]):
+                return False
+        key = state_key(code)
+        if key in path_visited:
+            return False
+        path_visited.add(key)
+        for i, j, amount, new_code in successors(code):
+            path.append((i, j, amount))
+            if backtrack_recursive(new_code):
+                return True
+            path.pop()
+            if budget is not None and budget.exhausted:
+                return False
+        path_visited.remove(key)
+        return False
+
+    solution_path = path if backtrack_recursive(initial_code) else None
+    if solution_path:
+        return _search_result(solution_path, start_time, nodes_visited[0])
+    if budget is not None and budget.exhausted:
+        return _partial_result(budget.best, start_time, nodes_visited[0], budget)
+    return None
+
+# The bee colony works on move lists that may contain illegal pours (they
+# are skipped). Each food source keeps the trace of its replay: codes[k] is
+# the packed state after its first k moves and valid[k] how many of those
+# were legal; the trace stops at the first goal, since later moves are
+# ignored. A neighbor only differs from its source from one index on, so
+# its trace is the source's trace up to that index plus a replay of the
+# suffix. Onlookers are assigned to sources from the fitness at the start of
+# their phase, before any of their neighbors is evaluated.
+def solve_abca(initial_state, heuristic_engine=None, max_cycles=200, num_bees=50, budget=None):
+    start_time = time.time()
+    if budget is not None:
+        budget = budget.run()
+    initial_state = make_state(initial_state)
+    n_tubes = len(initial_state)
+    initial_code, _ = pack_state(initial_state)
+    LIMIT = 10
+    MIN_PATH_LEN = 10
+    MAX_PATH_LEN = 40
+    engine = heuristic_engine or get_heuristic_engine()
+    root_trace = ([initial_code], [0])
+    nodes = 0
+
+    def replay(path, trace, start):
+        codes = trace[0][:start + 1]
+        valid = trace[1][:start + 1]
+        code = codes[-1]
+        count = valid[-1]
+        if start and packed_is_goal(code, n_tubes):
+            return codes, valid
+        for from_t, to_t in path[start:]:
+            new_code = packed_apply_move(code, n_tubes, from_t, to_t)
+            if new_code is not None:
+                code = new_code
+                count += 1
+            codes.append(code)
+            valid.append(count)
+            if new_code is not None and packed_is_goal(code, n_tubes):
+                break
+        return codes, valid
+
+    def calculate_fitness(path, trace):
+        codes, valid = trace
+        if packed_is_goal(codes[-1], n_tubes):
+            return 10000 - valid[-1]
+        return -engine.evaluate_packed(codes[-1], n_tubes) - len(path) * 0.1
+
+    def evaluate_candidates(candidates):
+        # candidates: (path, trace it shares a prefix with, first changed index)
+        evaluated = []
+        for path, trace, start in candidates:
+            new_trace = replay(path, trace, start)
+            evaluated.append((path, new_trace, calculate_fitness(path, new_trace)))
+        return evaluated
+
+    def valid_moves(path):
+        code = initial_code
+        valid_path = []
+        for from_t, to_t in path:
+            new_code = packed_apply_move(code, n_tubes, from_t, to_t)
+            if new_code is not None:
+                code = new_code
+                valid_path.append((from_t, to_t))
+                if packed_is_goal(code, n_tubes):
+                    break
+        return valid_path
+
+    def generate_random_path():
+        path_len = random.randint(MIN_PATH_LEN, MAX_PATH_LEN)
+        path = []
+        code = initial_code
+        for _ in range(path_len):
+            moves = packed_successors(code, n_tubes)
+            if not moves: break
+            i, j, code = random.choice(moves)
+            path.append((i, j))
+        return path
+
+    def generate_neighbor(source):
+        path, trace = food_sources[source], traces[source]
+        new_path = path[:]
+        if not new_path: return generate_random_path(), root_trace, 0
+        mutation_type = random.random()
+        if mutation_type < 0.5:
+            idx = random.randint(0, len(new_path) - 1)
+            new_path[idx] = (random.randint(0, n_tubes - 1), random.randint(0, n_tubes - 1))
+        elif mutation_type < 0.75 and len(new_path) > MIN_PATH_LEN:
+            idx = random.randint(0, len(new_path) - 1)
+            new_path.pop(idx)
+        else:
+            idx = random.randint(0, len(new_path))
+            new_path.insert(idx, (random.randint(0, n_tubes - 1), random.randint(0, n_tubes - 1)))
+        return new_path[:MAX_PATH_LEN], trace, idx
+
+    def try_improve(source, evaluated):
+        path, trace, fitness = evaluated
+        if fitness > fitness_scores[source]:
+            food_sources[source] = path
+            traces[source] = trace
+            fitness_scores[source] = fitness
+            trials[source] = 0
+        else:
+            trials[source] += 1
+
+    food_sources = [generate_random_path() for _ in range(num_bees)]
+    evaluated = evaluate_candidates([(path, root_trace, 0) for path in food_sources])
+    traces = [trace for _, trace, _ in evaluated]
+    fitness_scores = [fitness for _, _, fitness in evaluated]
+    trials = [0] * num_bees
+    best_solution_path = None
+    best_fitness = -float('inf')
+
+    for cycle in range(max_cycles):
+        employed = evaluate_candidates([generate_neighbor(i) for i in range(num_bees)])
+        nodes += len(employed)
+        for i in range(num_bees):
+            try_improve(i, employed[i])
+        total_fitness = sum(f for f in fitness_scores if f > 0)
+        if total_fitness > 0:
+            probabilities = [f / total_fitness for f in fitness_scores]
+            chosen = []
+            for i in range(num_bees):
+                chosen_index = -1
+                r = random.random()
+                cumulative_prob = 0
+                for j in range(num_bees):
+                    cumulative_prob += probabilities[j]
+                    if r <= cumulative_prob:
+                        chosen_index = j
+                        break
+                if chosen_index == -1: chosen_index = num_bees - 1
+                chosen.append(chosen_index)
+            onlookers = evaluate_candidates([generate_neighbor(j) for j in chosen])
+            nodes += len(onlookers)
+            for chosen_index, evaluated in zip(chosen, onlookers):
+                try_improve(chosen_index, evaluated)
+        for i in range(num_bees):
+            if fitness_scores[i] > best_fitness:
+                best_fitness = fitness_scores[i]
+                best_solution_path = food_sources[i]
+        if best_fitness > 9000:
+            valid_path = valid_moves(best_solution_path)
+            return {
+                'path': valid_path, 'steps': len(valid_path),
+                'time': time.time() - start_time, 'nodes': nodes
+            }
+        if budget is not None:
+            budget.record(-best_fitness, best_solution_path)
+            if not budget.allows(nodes):
+                return _partial_result(valid_moves(budget.best), start_time, nodes, budget)
+        scouts = [i for i in range(num_bees) if trials[i] > LIMIT]
+        for i, (path, trace, fitness) in zip(scouts, evaluate_candidates(
+                [(generate_random_path(), root_trace, 0) for _ in scouts])):
+            food_sources[i] = path
+            traces[i] = trace
+            fitness_scores[i] = fitness
+            trials[i] = 0
+    return None
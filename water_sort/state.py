@@ -0,0 +1,61 @@
+from collections import Counter
+
+# --- CONSTANTS ---
+CAPACITY = 4
+
+# Colors
+ALL_COLORS = [
+    (255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 255, 0),
+    (255, 165, 0), (128, 0, 128), (0, 255, 255), (255, 192, 203),
+    (165, 42, 42), (128, 128, 0), (0, 128, 0), (255, 0, 255)
+]
+
+# --- State Model ---
+# A state is a tuple of tubes, each tube a tuple of colors from bottom to top.
+def make_state(tubes_colors):
+    return tuple(tuple(tube) for tube in tubes_colors)
+
+def is_goal_state(state):
+    return all(len(set(colors)) <= 1 and (len(colors) == 0 or len(colors) == CAPACITY) for colors in state)
+
+# --- Core Solver Helpers ---
+def can_pour_on_state(state, from_idx, to_idx):
+    if from_idx == to_idx: return False
+    source_tube, dest_tube = state[from_idx], state[to_idx]
+    if not source_tube: return False
+    if len(dest_tube) >= CAPACITY: return False
+    return not dest_tube or dest_tube[-1] == source_tube[-1]
+
+def apply_move_on_state(state, from_idx, to_idx):
+    state_list = [list(tube) for tube in state]
+    if not state_list[from_idx]: return state
+
+    color_to_move = state_list[from_idx].pop()
+    state_list[to_idx].append(color_to_move)
+
+    return tuple(tuple(tube) for tube in state_list)
+
+def get_all_valid_moves(state):
+    moves = []
+    n = len(state)
+    for i in range(n):
+        for j in range(n):
+            if can_pour_on_state(state, i, j):
+                moves.append((i, j))
+    return moves
+
+def heuristic(state):
+    total_score = 0
+    for tube in state:
+        if not tube: continue
+        if len(set(tube)) <= 1:
+            continue
+        try:
+            counts = Counter(tube)
+            most_common_color = counts.most_common(1)[0][0]
+            for color in tube:
+                if color != most_common_color:
+                    total_score += 1
+        except IndexError:
+            continue
+    return total_score
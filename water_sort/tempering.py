@@ -0,0 +1,186 @@
+import math
+import multiprocessing
+import os
+import random
+import time
+
+from .state import make_state
+from .packed import pack_state, packed_is_goal, packed_successors, packed_apply_move
+from .heuristics import get_heuristic_engine
+
+# --- Parallel Tempering ---
+# num_chains simulated-annealing chains run at fixed temperatures spread
+# geometrically between MIN_TEMPERATURE and MAX_TEMPERATURE instead of one
+# chain cooling down and restarting. Every exchange_interval iterations the
+# chains report their heuristic and neighboring temperatures are offered a
+# swap, accepted with probability min(1, exp((h_i - h_j) * (1/T_i - 1/T_j))),
+# so good states drift to the cold end and stuck ones get reheated. Only the
+# temperatures move; the chains (and their paths) stay where they are,
+# except that a coldest chain worse than the best state any chain has seen
+# is restarted from that state for the next round.
+#
+# Chains are dealt round-robin to worker processes (in-process when there is
+# one worker) and keep their heuristic up to date with packed_after_move.
+# Each chain's path is loop-erased (returning to a state cuts the path back
+# to its first visit), so paths stay short however long a chain wanders.
+# The first goal any chain reaches ends the search; the best state seen by
+# any chain is what a budget-limited run returns.
+MIN_TEMPERATURE = 0.05
+MAX_TEMPERATURE = 2.0
+DEFAULT_CHAINS = 8
+EXCHANGE_INTERVAL = 200
+PARENT_POLL = 0.5
+
+class _Replicas:
+    def __init__(self, initial_code, num_tubes, engine, chain_ids, seed):
+        self.initial_code = initial_code
+        self.num_tubes = num_tubes
+        self.engine = engine
+        self.random = random.Random(seed)
+        self.initial_h = engine.evaluate_packed(initial_code, num_tubes)
+        self.chains = {chain_id: self._fresh() for chain_id in chain_ids}
+
+    def _fresh(self):
+        return {'code': self.initial_code, 'h': self.initial_h, 'path': [], 'codes': [self.initial_code],
+                'positions': {self.initial_code: 0}}
+
+    def _replay(self, path):
+        chain = self._fresh()
+        for i, j in path:
+            chain['code'] = packed_apply_move(chain['code'], self.num_tubes, i, j)
+            chain['path'].append((i, j))
+            chain['codes'].append(chain['code'])
+            chain['positions'][chain['code']] = len(chain['codes']) - 1
+        chain['h'] = self.engine.evaluate_packed(chain['code'], self.num_tubes)
+        return chain
+
+    def _step(self, chain, temperature):
+        children = packed_successors(chain['code'], self.num_tubes)
+        if not children:
+            chain.update(self._fresh())
+            return
+        i, j, new_code = self.random.choice(children)
+        new_h = self.engine.packed_after_move(chain['h'], chain['code'], new_code, i, j)
+        delta = new_h - chain['h']
+        if delta > 0 and self.random.random() >= math.exp(-delta / temperature):
+            return
+        position = chain['positions'].get(new_code)
+        if position is None:
+            chain['path'].append((i, j))
+            chain['codes'].append(new_code)
+            chain['positions'][new_code] = len(chain['codes']) - 1
+        else:
+            for code in chain['codes'][position + 1:]:
+                del chain['positions'][code]
+            del chain['path'][position:]
+            del chain['codes'][position + 1:]
+        chain['code'] = new_code
+        chain['h'] = new_h
+
+    def run(self, temperatures, iterations, reseed=None):
+        # reseed: (chain_id, path) restarts that chain, if it is one of ours,
+        # at the end of path.
+        if reseed is not None and reseed[0] in self.chains:
+            self.chains[reseed[0]] = self._replay(reseed[1])
+        best = None
+        nodes = 0
+        for chain_id, chain in self.chains.items():
+            temperature = temperatures[chain_id]
+            if packed_is_goal(chain['code'], self.num_tubes):
+                return {'energies': {}, 'best': None, 'goal': chain['path'][:], 'nodes': nodes}
+            for _ in range(iterations):
+                nodes += 1
+                self._step(chain, temperature)
+                if packed_is_goal(chain['code'], self.num_tubes):
+                    return {'energies': {}, 'best': None, 'goal': chain['path'][:], 'nodes': nodes}
+                if best is None or chain['h'] < best[0]:
+                    best = (chain['h'], chain['path'][:])
+        energies = {chain_id: chain['h'] for chain_id, chain in self.chains.items()}
+        return {'energies': energies, 'best': best, 'goal': None, 'nodes': nodes}
+
+def _tempering_worker(connection, initial_code, num_tubes, engine, chain_ids, seed):
+    parent = multiprocessing.parent_process()
+    replicas = _Replicas(initial_code, num_tubes, engine, chain_ids, seed)
+    while True:
+        while not connection.poll(PARENT_POLL):
+            if parent is not None and not parent.is_alive():
+                return
+        command = connection.recv()
+        if command[0] != "run":
+            return
+        connection.send(replicas.run(command[1], command[2], command[3]))
+
+def solve_parallel_tempering(initial_state, heuristic_engine=None, num_chains=DEFAULT_CHAINS, workers=None,
+                             max_iter=20000, exchange_interval=EXCHANGE_INTERVAL, budget=None):
+    start_time = time.time()
+    if budget is not None:
+        budget = budget.run()
+    initial_code, _ = pack_state(make_state(initial_state))
+    num_tubes = len(initial_state)
+    engine = heuristic_engine or get_heuristic_engine()
+    num_workers = max(1, min(num_chains, workers or os.cpu_count() or 1))
+    ratio = (MAX_TEMPERATURE / MIN_TEMPERATURE) ** (1 / max(1, num_chains - 1))
+    ladder = [MIN_TEMPERATURE * ratio ** k for k in range(num_chains)]
+    # rung[k] is the chain currently at ladder[k].
+    rung = list(range(num_chains))
+    groups = [list(range(index, num_chains, num_workers)) for index in range(num_workers)]
+    seeds = [random.getrandbits(32) for _ in groups]
+    connections = []
+    processes = []
+    local = None
+    if num_workers == 1:
+        local = _Replicas(initial_code, num_tubes, engine, groups[0], seeds[0])
+    else:
+        for group, seed in zip(groups, seeds):
+            connection, child_connection = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=_tempering_worker,
+                args=(child_connection, initial_code, num_tubes, engine, group, seed), daemon=True)
+            process.start()
+            connections.append(connection)
+            processes.append(process)
+
+    nodes = 0
+    best_h = None
+    best_path = []
+    reseed = None
+    try:
+        for _ in range(max(1, max_iter // exchange_interval)):
+            temperatures = {chain_id: ladder[k] for k, chain_id in enumerate(rung)}
+            if local is not None:
+                reports = [local.run(temperatures, exchange_interval, reseed)]
+            else:
+                for connection in connections:
+                    connection.send(("run", temperatures, exchange_interval, reseed))
+                reports = [connection.recv() for connection in connections]
+            energies = {}
+            for report in reports:
+                nodes += report['nodes']
+                if report['goal'] is not None:
+                    path = report['goal']
+                    return {'path': path, 'steps': len(path), 'time': time.time() - start_time, 'nodes': nodes}
+                energies.update(report['energies'])
+                if best_h is None or report['best'][0] < best_h:
+                    best_h, best_path = report['best']
+            if budget is not None:
+                budget.record(best_h, best_path)
+                if not budget.allows(nodes):
+                    return {'path': budget.best, 'steps': len(budget.best), 'time': time.time() - start_time,
+                            'nodes': nodes, 'stuck': True, 'exhausted': budget.exhausted}
+            for k in range(num_chains - 1):
+                cold, hot = rung[k], rung[k + 1]
+                exponent = (energies[cold] - energies[hot]) * (1 / ladder[k] - 1 / ladder[k + 1])
+                if exponent >= 0 or random.random() < math.exp(exponent):
+                    rung[k], rung[k + 1] = hot, cold
+            reseed = (rung[0], best_path) if best_h < energies[rung[0]] else None
+        return None
+    finally:
+        for connection in connections:
+            try:
+                connection.send(("stop",))
+            except OSError:
+                pass
+        for process in processes:
+            process.join(PARENT_POLL)
+            if process.is_alive():
+                process.terminate()
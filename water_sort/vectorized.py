@@ -0,0 +1,152 @@
+import time
+
+import numpy as np
+
+from .state import CAPACITY, make_state
+from .packed import TUBE_BITS, SLOT_BITS, SLOT_MASK, pack_state, split_tubes, expand_macro_path
+
+# --- Vectorized BFS ---
+# Breadth-first search that expands a whole layer at once with NumPy. A
+# layer is a 2D uint16 array, one row per state and one column per tube code
+# (the packed tube encoding, see packed.py). Per-tube facts (length, top,
+# top run, complete, minority) come from lookup tables over all 2**16 tube
+# codes, so the legality mask, the poured amount and both new tube codes of
+# a move (i, j) are array expressions over the layer. Moves are the macro
+# pours of packed_macro_successors, including its pruning of dominated moves.
+#
+# Duplicates are removed with canonical keys: each row sorted (tube order
+# does not matter) and viewed as one fixed-width byte string, np.unique
+# within the layer and a sorted array of every key seen so far for the
+# layers before it. Rows keep their real tube order; only parent indices and
+# move codes are kept per layer to rebuild the path.
+_TABLES = None
+
+def _tube_tables():
+    global _TABLES
+    if _TABLES is None:
+        if TUBE_BITS > 16:
+            raise ValueError("Vectorized BFS needs tube codes that fit in 16 bits")
+        codes = np.arange(1 << TUBE_BITS, dtype=np.int64)
+        slots = np.stack([(codes >> (slot * SLOT_BITS)) & SLOT_MASK for slot in range(CAPACITY)], axis=1)
+        length = np.zeros(len(codes), dtype=np.int64)
+        for slot in range(CAPACITY):
+            length = np.where(slots[:, slot] != 0, slot + 1, length)
+        rows = np.arange(len(codes))
+        top = np.where(length > 0, slots[rows, np.maximum(length - 1, 0)], 0)
+        run = np.zeros(len(codes), dtype=np.int64)
+        counting = length > 0
+        for depth in range(CAPACITY):
+            position = length - 1 - depth
+            same = counting & (position >= 0) & (slots[rows, np.maximum(position, 0)] == top)
+            run += same
+            counting = same
+        most_common = np.zeros(len(codes), dtype=np.int64)
+        for color in range(1, SLOT_MASK + 1):
+            most_common = np.maximum(most_common, (slots == color).sum(axis=1))
+        done = (length == 0) | ((length == CAPACITY) & (run == CAPACITY))
+        _TABLES = {
+            'length': length.astype(np.uint8),
+            'top': top.astype(np.uint16),
+            'run': run.astype(np.uint8),
+            'done': done,
+            'minority': (length - most_common).astype(np.uint8),
+        }
+    return _TABLES
+
+_LOW_MASKS = np.array([(1 << (slot * SLOT_BITS)) - 1 for slot in range(CAPACITY + 1)], dtype=np.uint16)
+_RUN_UNITS = np.array([sum(1 << (slot * SLOT_BITS) for slot in range(amount)) for amount in range(CAPACITY + 1)],
+                      dtype=np.uint16)
+
+def _layer_keys(layer):
+    rows = np.ascontiguousarray(np.sort(layer, axis=1))
+    return rows.view(np.dtype((np.void, rows.shape[1] * rows.itemsize))).ravel()
+
+def expand_layer(layer):
+    # All macro children of every row: (children, parent rows, move codes).
+    # A move code is (from_idx * num_tubes + to_idx) * 8 + amount.
+    tables = _tube_tables()
+    num_tubes = layer.shape[1]
+    length = tables['length'][layer].astype(np.int64)
+    top = tables['top'][layer]
+    run = tables['run'][layer].astype(np.int64)
+    done = tables['done'][layer]
+    empty = length == 0
+    has_empty = empty.any(axis=1)
+    first_empty = np.where(has_empty, empty.argmax(axis=1), -1)
+    children, parents, moves = [], [], []
+    for i in range(num_tubes):
+        can_give = (length[:, i] > 0) & ~done[:, i]
+        to_empty = can_give & (run[:, i] < length[:, i])
+        for j in range(num_tubes):
+            if i == j:
+                continue
+            onto_color = (length[:, j] > 0) & (length[:, j] < CAPACITY) & (top[:, j] == top[:, i])
+            mask = can_give & (onto_color | (to_empty & (first_empty == j)))
+            rows = np.nonzero(mask)[0]
+            if not len(rows):
+                continue
+            length_i = length[rows, i]
+            length_j = length[rows, j]
+            amount = np.minimum(run[rows, i], CAPACITY - length_j)
+            child = layer[rows]
+            child[:, i] &= _LOW_MASKS[length_i - amount]
+            child[:, j] |= (top[rows, i] * _RUN_UNITS[amount]) << (length_j * SLOT_BITS).astype(np.uint16)
+            children.append(child)
+            parents.append(rows)
+            moves.append((i * num_tubes + j) * 8 + amount)
+    if not children:
+        return np.empty((0, num_tubes), dtype=np.uint16), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    return np.concatenate(children), np.concatenate(parents), np.concatenate(moves)
+
+def _layer_path(history, layer_index, row, num_tubes):
+    moves = []
+    while layer_index > 0:
+        parents, move_codes = history[layer_index]
+        tubes, amount = divmod(int(move_codes[row]), 8)
+        moves.append((tubes // num_tubes, tubes % num_tubes, amount))
+        row = int(parents[row])
+        layer_index -= 1
+    moves.reverse()
+    return moves
+
+def solve_bfs_numpy(initial_state, budget=None):
+    start_time = time.time()
+    if budget is not None:
+        budget = budget.run()
+    tables = _tube_tables()
+    initial_state = make_state(initial_state)
+    num_tubes = len(initial_state)
+    initial_code, _ = pack_state(initial_state)
+    layer = np.array([split_tubes(initial_code, num_tubes)], dtype=np.uint16)
+    visited = _layer_keys(layer)
+    history = [(None, None)]
+    nodes = 0
+
+    while len(layer):
+        goals = np.nonzero(tables['done'][layer].all(axis=1))[0]
+        if len(goals):
+            nodes += int(goals[0]) + 1
+            moves = _layer_path(history, len(history) - 1, int(goals[0]), num_tubes)
+            path = expand_macro_path(moves)
+            return {'path': path, 'steps': len(path), 'time': time.time() - start_time, 'nodes': nodes,
+                    'pours': len(moves)}
+        nodes += len(layer)
+        if budget is not None:
+            scores = tables['minority'][layer].sum(axis=1, dtype=np.int64)
+            best = int(scores.argmin())
+            budget.record(int(scores[best]), (len(history) - 1, best))
+            if not budget.allows(nodes):
+                path = expand_macro_path(_layer_path(history, budget.best[0], budget.best[1], num_tubes))
+                return {'path': path, 'steps': len(path), 'time': time.time() - start_time, 'nodes': nodes,
+                        'stuck': True, 'exhausted': budget.exhausted}
+        children, parents, moves = expand_layer(layer)
+        keys = _layer_keys(children)
+        keys, first = np.unique(keys, return_index=True)
+        position = np.minimum(np.searchsorted(visited, keys), len(visited) - 1)
+        new = visited[position] != keys
+        keys, first = keys[new], first[new]
+        first.sort()
+        layer = children[first]
+        history.append((parents[first], moves[first]))
+        visited = np.sort(np.concatenate([visited, keys]))
+    return None
@@ -0,0 +1,106 @@
+import multiprocessing
+import queue
+import time
+
+from .budget import SearchBudget
+from .registry import SOLVERS
+
+# --- Background Solving ---
+# A SolveJob runs one registry solver in a child process so the caller (the
+# GUI event loop) never blocks on it. The solver publishes its node count
+# through a shared counter every CLOCK_INTERVAL nodes (via the budget's
+# progress callback). cancel() and the timeout terminate the process.
+# poll() is cheap enough to call every frame. With cache=SolutionCache(...)
+# a cached result finishes the job at once, without starting a process, and
+# new solutions are stored when they arrive. The process is not a daemon so
+# that solvers can start processes of their own (see parallel.py).
+RESULT_WAIT = 0.1
+
+def _solve_worker(results, nodes, solver, state, kwargs):
+    def report(count):
+        nodes.value = count
+
+    kwargs['budget'] = SearchBudget(progress=report)
+    try:
+        result = SOLVERS[solver][1](state, **kwargs)
+    except Exception as e:
+        results.put(("error", f"{type(e).__name__}: {e}"))
+        return
+    if result and result.get('nodes') is not None:
+        nodes.value = result['nodes']
+    results.put(("done", result))
+
+class SolveJob:
+    def __init__(self, solver, state, timeout=None, cache=None, **kwargs):
+        self.solver = solver
+        self.state = state
+        self.timeout = timeout
+        self.cache = cache
+        self.options = kwargs
+        self.status = "running"  # running, done, error, cancelled, timeout
+        self.result = None
+        self.error = None
+        self.start_time = time.time()
+        self.end_time = None
+        self._nodes = multiprocessing.Value('q', 0, lock=False)
+        if cache is not None:
+            self.result = cache.get(solver, state, **kwargs)
+            if self.result is not None:
+                self._nodes.value = self.result.get('nodes') or 0
+                self.status = "done"
+                self.end_time = time.time()
+                return
+        self._results = multiprocessing.Queue()
+        self._process = multiprocessing.Process(
+            target=_solve_worker, args=(self._results, self._nodes, solver, state, kwargs))
+        self._process.start()
+
+    @property
+    def nodes(self):
+        return self._nodes.value
+
+    @property
+    def elapsed(self):
+        return (self.end_time or time.time()) - self.start_time
+
+    @property
+    def running(self):
+        return self.status == "running"
+
+    def poll(self):
+        if not self.running:
+            return self.status
+        try:
+            message = self._results.get_nowait()
+        except queue.Empty:
+            if self._process.is_alive():
+                if self.timeout is not None and self.elapsed >= self.timeout:
+                    self._stop("timeout")
+                return self.status
+            try:
+                message = self._results.get(timeout=RESULT_WAIT)
+            except queue.Empty:
+                message = ("error", f"worker exited with code {self._process.exitcode}")
+        kind, payload = message
+        if kind == "done":
+            self.result = payload
+            if self.cache is not None and payload and not payload.get('stuck'):
+                self.cache.put(self.solver, self.state, payload, **self.options)
+        else:
+            self.error = payload
+        self._finish(kind)
+        return self.status
+
+    def cancel(self):
+        if self.running:
+            self._stop("cancelled")
+
+    def _stop(self, status):
+        self._process.terminate()
+        self._finish(status)
+
+    def _finish(self, status):
+        self.status = status
+        self.end_time = time.time()
+        self._process.join()
+        self._results.close()